@@ -3,36 +3,102 @@
 Performance Analysis Script - Analyze the impact of updates on search performance
 """
 
+import os
+import sys
 import pandas as pd
+import matplotlib
+
+# Use the non-interactive backend when there is no display to skip GUI backend setup
+if sys.platform.startswith('linux') and not (os.environ.get('DISPLAY') or os.environ.get('WAYLAND_DISPLAY')):
+    matplotlib.use('Agg')
+
 import matplotlib.pyplot as plt
 import seaborn as sns
 from datetime import datetime
 import numpy as np
 
+try:
+    from numba import njit
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+
+def read_metrics(name, dtype):
+    """Read a metrics log in time order, preferring the JSON lines log over a legacy CSV file"""
+    if os.path.exists(f'{name}.jsonl'):
+        df = pd.read_json(f'{name}.jsonl', lines=True, convert_dates=False, dtype=False)
+        # Older logs drop the fraction on whole seconds, so the format can't be inferred from one row
+        df['timestamp'] = pd.to_datetime(df['timestamp'], format='ISO8601')
+        df = df.astype(dtype)
+    else:
+        df = pd.read_csv(f'{name}.csv', engine='pyarrow', parse_dates=['timestamp'], dtype=dtype)
+    
+    # Logs merged from several search workers hold one worker's rows after another
+    return df.sort_values('timestamp', kind='stable', ignore_index=True)
+
 def load_data():
-    """Load performance data from CSV files"""
+    """Load performance data from the metrics logs"""
     try:
         # Load update metrics
-        update_df = pd.read_csv('price_update_metrics.csv')
-        update_df['timestamp'] = pd.to_datetime(update_df['timestamp'])
+        # Reductions are memory-bound, so keep numeric columns at 32 bits
+        update_df = read_metrics(
+            'price_update_metrics',
+            {'iteration': 'int32', 'duration_seconds': 'float32', 'updates_per_second': 'float32'}
+        )
         print(f"✓ Loaded {len(update_df)} update records")
         
-        # Load search metrics
-        search_df = pd.read_csv('search_performance_metrics.csv')
-        search_df['timestamp'] = pd.to_datetime(search_df['timestamp'])
+        # Load search metrics; categorical types make the groupby by type hash small ints
+        search_df = read_metrics(
+            'search_performance_metrics',
+            {'success': 'bool', 'search_type': 'category', 'query_type': 'category', 'duration_ms': 'float32'}
+        )
         print(f"✓ Loaded {len(search_df)} search records")
         
         return update_df, search_df
         
     except FileNotFoundError as e:
-        print(f"✗ CSV file not found: {e}")
+        print(f"✗ Metrics file not found: {e}")
         print("Please run the performance test scripts first")
         return None, None
     except Exception as e:
         print(f"✗ Error loading data: {e}")
         return None, None
 
-def analyze_search_performance(search_df):
+def _group_sums(codes, values, num_groups):
+    """Per-group sums and counts in a single pass over group codes"""
+    sums = np.zeros(num_groups, dtype=np.float64)
+    counts = np.zeros(num_groups, dtype=np.int64)
+    for i in range(len(codes)):
+        sums[codes[i]] += values[i]
+        counts[codes[i]] += 1
+    return sums, counts
+
+if NUMBA_AVAILABLE:
+    _group_sums = njit(cache=True)(_group_sums)
+
+def duration_stats_by(df, by):
+    """Mean, median and count of search duration per group"""
+    if not NUMBA_AVAILABLE:
+        return df.groupby(by, observed=True)['duration_ms'].agg(['mean', 'median', 'count'])
+    
+    codes, groups = pd.factorize(df[by], sort=True)
+    values = df['duration_ms'].to_numpy(np.float64)
+    
+    # Rows without a group are dropped, as groupby does
+    has_group = codes >= 0
+    codes, values = codes[has_group], values[has_group]
+    sums, counts = _group_sums(codes, values, len(groups))
+    
+    # After a stable sort by code every group is a contiguous slice
+    sorted_values = values[np.argsort(codes, kind='stable')]
+    medians = [np.median(group) for group in np.split(sorted_values, np.cumsum(counts)[:-1])]
+    
+    return pd.DataFrame(
+        {'mean': sums / counts, 'median': medians, 'count': counts},
+        index=pd.Index(groups, name=by)
+    )
+
+def analyze_search_performance(search_df, successful_searches):
     """Analyze search performance metrics"""
     print("\n" + "=" * 50)
     print("SEARCH PERFORMANCE ANALYSIS")
@@ -46,25 +112,25 @@ def analyze_search_performance(search_df):
     print()
     
     # Performance metrics
-    successful_searches = search_df[search_df['success']]
     if len(successful_searches) > 0:
+        durations = successful_searches['duration_ms'].to_numpy()
         print("Search Duration Statistics:")
-        print(f"  Average: {successful_searches['duration_ms'].mean():.2f}ms")
-        print(f"  Median: {successful_searches['duration_ms'].median():.2f}ms")
-        print(f"  Min: {successful_searches['duration_ms'].min():.2f}ms")
-        print(f"  Max: {successful_searches['duration_ms'].max():.2f}ms")
-        print(f"  Std Dev: {successful_searches['duration_ms'].std():.2f}ms")
+        print(f"  Average: {np.mean(durations):.2f}ms")
+        print(f"  Median: {np.median(durations):.2f}ms")
+        print(f"  Min: {np.min(durations):.2f}ms")
+        print(f"  Max: {np.max(durations):.2f}ms")
+        print(f"  Std Dev: {np.std(durations, ddof=1):.2f}ms")
         print()
         
         # Performance by search type
         print("Performance by Search Type:")
-        search_stats = successful_searches.groupby('search_type')['duration_ms'].agg(['mean', 'median', 'count'])
+        search_stats = duration_stats_by(successful_searches, 'search_type')
         print(search_stats.round(2))
         print()
         
         # Performance by query type
         print("Performance by Query Type:")
-        query_stats = successful_searches.groupby('query_type')['duration_ms'].agg(['mean', 'median', 'count'])
+        query_stats = duration_stats_by(successful_searches, 'query_type')
         print(query_stats.round(2))
         print()
 
@@ -97,7 +163,106 @@ def analyze_update_performance(update_df):
     print(f"  Max: {update_df['updates_per_second'].max():.2f} updates/sec")
     print()
 
-def correlation_analysis(update_df, search_df):
+def _join_update_periods(search_ts, search_durations, update_starts, update_ends):
+    """Two-pointer merge of sorted search timestamps against sorted update periods"""
+    num_searches = len(search_ts)
+    num_updates = len(update_starts)
+    first = np.zeros(num_updates, dtype=np.int64)
+    counts = np.zeros(num_updates, dtype=np.int64)
+    sums = np.zeros(num_updates, dtype=np.float64)
+    maxs = np.zeros(num_updates, dtype=np.float64)
+    
+    start = 0
+    for u in range(num_updates):
+        # Update starts are sorted, so searches before this one can never match again
+        while start < num_searches and search_ts[start] < update_starts[u]:
+            start += 1
+        
+        end = start
+        while end < num_searches and search_ts[end] <= update_ends[u]:
+            sums[u] += search_durations[end]
+            if search_durations[end] > maxs[u]:
+                maxs[u] = search_durations[end]
+            end += 1
+        
+        first[u] = start
+        counts[u] = end - start
+    
+    return first, counts, sums, maxs
+
+if NUMBA_AVAILABLE:
+    _join_update_periods = njit(cache=True)(_join_update_periods)
+
+def find_update_periods(update_df, successful_searches):
+    """Collect search statistics for every update period with concurrent searches"""
+    if not NUMBA_AVAILABLE:
+        return _find_update_periods_pandas(update_df, successful_searches)
+    
+    successful_searches = successful_searches.sort_values('timestamp')
+    search_ts = successful_searches['timestamp'].values.astype('datetime64[ns]').view('int64')
+    search_durations = successful_searches['duration_ms'].to_numpy(np.float64)
+    
+    updates = update_df.sort_values('timestamp')
+    update_starts = updates['timestamp'].values.astype('datetime64[ns]').view('int64')
+    update_ends = update_starts + (updates['duration_seconds'].to_numpy(np.float64) * 1e9).astype(np.int64)
+    
+    first, counts, sums, maxs = _join_update_periods(search_ts, search_durations, update_starts, update_ends)
+    
+    # Searches are sorted by time, so each update period covers a contiguous slice
+    has_searches = counts > 0
+    first, counts = first[has_searches], counts[has_searches]
+    return pd.DataFrame({
+        'iteration': updates['iteration'].to_numpy()[has_searches],
+        'update_duration': updates['duration_seconds'].to_numpy()[has_searches],
+        'updates_per_second': updates['updates_per_second'].to_numpy()[has_searches],
+        'search_count': counts,
+        'avg_search_duration': sums[has_searches] / counts,
+        'median_search_duration': [np.median(search_durations[f:f + c]) for f, c in zip(first, counts)],
+        'max_search_duration': maxs[has_searches]
+    })
+
+def _find_update_periods_pandas(update_df, successful_searches):
+    """Fallback for find_update_periods when numba is not installed"""
+    search_ts = successful_searches['timestamp'].values
+    search_durations = successful_searches['duration_ms'].to_numpy()
+    
+    update_starts = update_df['timestamp'].values
+    update_ends = update_starts + (update_df['duration_seconds'].to_numpy(np.float64) * 1e9).astype('timedelta64[ns]')
+    
+    update_periods = []
+    for iteration, update_start, update_end, update_duration, updates_per_second in zip(
+        update_df['iteration'].to_numpy(), update_starts, update_ends,
+        update_df['duration_seconds'].to_numpy(), update_df['updates_per_second'].to_numpy()
+    ):
+        # Find searches that occurred during this update
+        during_update = search_durations[(search_ts >= update_start) & (search_ts <= update_end)]
+        
+        if len(during_update) > 0:
+            update_periods.append({
+                'iteration': iteration,
+                'update_duration': update_duration,
+                'updates_per_second': updates_per_second,
+                'search_count': len(during_update),
+                'avg_search_duration': np.mean(during_update),
+                'median_search_duration': np.median(during_update),
+                'max_search_duration': np.max(during_update)
+            })
+    
+    return pd.DataFrame(update_periods)
+
+def during_updates(update_df, search_df):
+    """Boolean mask of searches that ran while an update period was in progress"""
+    update_starts = update_df['timestamp'].values.astype('datetime64[ns]').view('int64')
+    update_ends = update_starts + (update_df['duration_seconds'].to_numpy(np.float64) * 1e9).astype(np.int64)
+    
+    # A timestamp is inside some period iff more periods have started by then
+    # than have ended before it; this holds even when periods overlap
+    search_ts = search_df['timestamp'].values.astype('datetime64[ns]').view('int64')
+    started = np.searchsorted(np.sort(update_starts), search_ts, side='right')
+    ended = np.searchsorted(np.sort(update_ends), search_ts, side='left')
+    return started - ended > 0
+
+def correlation_analysis(update_df, search_df, successful_searches):
     """Analyze correlation between updates and search performance"""
     print("\n" + "=" * 50)
     print("CORRELATION ANALYSIS")
@@ -108,38 +273,19 @@ def correlation_analysis(update_df, search_df):
         return
     
     # Find search times during update periods
-    update_periods = []
-    for _, update_row in update_df.iterrows():
-        update_start = update_row['timestamp']
-        update_end = update_start + pd.Timedelta(seconds=update_row['duration_seconds'])
-        
-        # Find searches that occurred during this update
-        during_update = search_df[
-            (search_df['timestamp'] >= update_start) & 
-            (search_df['timestamp'] <= update_end) &
-            (search_df['success'] == True)
-        ]
-        
-        if len(during_update) > 0:
-            update_periods.append({
-                'iteration': update_row['iteration'],
-                'update_duration': update_row['duration_seconds'],
-                'updates_per_second': update_row['updates_per_second'],
-                'search_count': len(during_update),
-                'avg_search_duration': during_update['duration_ms'].mean(),
-                'median_search_duration': during_update['duration_ms'].median(),
-                'max_search_duration': during_update['duration_ms'].max()
-            })
+    correlation_df = find_update_periods(update_df, successful_searches)
     
-    if update_periods:
-        correlation_df = pd.DataFrame(update_periods)
+    if len(correlation_df) > 0:
         print(f"Found {len(correlation_df)} update periods with concurrent searches")
         print()
         
-        # Calculate correlations
+        # Calculate correlations in one pass over the three columns
+        correlation_matrix = np.corrcoef(
+            correlation_df[['update_duration', 'updates_per_second', 'avg_search_duration']].to_numpy(np.float32).T
+        )
         correlations = {
-            'update_duration_vs_search_time': correlation_df['update_duration'].corr(correlation_df['avg_search_duration']),
-            'update_rate_vs_search_time': correlation_df['updates_per_second'].corr(correlation_df['avg_search_duration']),
+            'update_duration_vs_search_time': correlation_matrix[0, 2],
+            'update_rate_vs_search_time': correlation_matrix[1, 2],
         }
         
         print("Correlation Coefficients:")
@@ -154,16 +300,7 @@ def correlation_analysis(update_df, search_df):
         print()
         
         # Time-based analysis
-        search_without_updates = search_df[
-            ~search_df['timestamp'].isin(
-                pd.concat([
-                    pd.date_range(start=update_row['timestamp'], 
-                                end=update_row['timestamp'] + pd.Timedelta(seconds=update_row['duration_seconds']), 
-                                freq='1s')
-                    for _, update_row in update_df.iterrows()
-                ])
-            ) & (search_df['success'] == True)
-        ]
+        search_without_updates = successful_searches[~during_updates(update_df, successful_searches)]
         
         if len(search_without_updates) > 0:
             print("Performance Comparison:")
@@ -176,7 +313,36 @@ def correlation_analysis(update_df, search_df):
     else:
         print("No concurrent update/search periods found")
 
-def create_visualizations(update_df, search_df):
+def boxplot_stats(df, by, column):
+    """Box plot statistics per group, computed with grouped reductions for Axes.bxp"""
+    groups = df[by]
+    values = df[column]
+    grouped = values.groupby(groups, sort=False, observed=True)
+    q1 = grouped.quantile(0.25)
+    median = grouped.median()
+    q3 = grouped.quantile(0.75)
+    iqr = q3 - q1
+    
+    # Whiskers reach the most extreme values within 1.5 IQR of the box, the rest are fliers
+    inside = (values >= groups.map(q1 - 1.5 * iqr).astype(float)) & (values <= groups.map(q3 + 1.5 * iqr).astype(float))
+    whisker_low = values[inside].groupby(groups[inside], observed=True).min()
+    whisker_high = values[inside].groupby(groups[inside], observed=True).max()
+    fliers = {key: group.to_numpy() for key, group in values[~inside].groupby(groups[~inside], observed=True)}
+    
+    return [
+        {
+            'label': key,
+            'q1': q1[key],
+            'med': median[key],
+            'q3': q3[key],
+            'whislo': whisker_low[key],
+            'whishi': whisker_high[key],
+            'fliers': fliers.get(key, [])
+        }
+        for key in q1.index
+    ]
+
+def create_visualizations(update_df, search_df, successful_searches):
     """Create visualizations if matplotlib is available"""
     try:
         import matplotlib.pyplot as plt
@@ -192,7 +358,6 @@ def create_visualizations(update_df, search_df):
         
         # Search duration over time
         if len(search_df) > 0:
-            successful_searches = search_df[search_df['success']]
             axes[0, 0].plot(successful_searches['timestamp'], successful_searches['duration_ms'], 'b-', alpha=0.7)
             axes[0, 0].set_title('Search Duration Over Time')
             axes[0, 0].set_ylabel('Duration (ms)')
@@ -207,12 +372,8 @@ def create_visualizations(update_df, search_df):
         
         # Search duration by query type
         if len(search_df) > 0:
-            successful_searches = search_df[search_df['success']]
             if len(successful_searches) > 0 and 'query_type' in successful_searches.columns:
-                unique_query_types = successful_searches['query_type'].unique()
-                box_data = [successful_searches[successful_searches['query_type'] == qt]['duration_ms'].values 
-                           for qt in unique_query_types]
-                axes[1, 0].boxplot(box_data, labels=unique_query_types)
+                axes[1, 0].bxp(boxplot_stats(successful_searches, 'query_type', 'duration_ms'))
                 axes[1, 0].set_title('Search Duration by Query Type')
                 axes[1, 0].set_ylabel('Duration (ms)')
                 axes[1, 0].tick_params(axis='x', rotation=45)
@@ -222,14 +383,12 @@ def create_visualizations(update_df, search_df):
             ax_combined = axes[1, 1]
             
             # Plot search times
-            successful_searches = search_df[search_df['success']]
             ax_combined.scatter(successful_searches['timestamp'], successful_searches['duration_ms'], 
                               c='blue', alpha=0.5, s=10, label='Search Duration')
             
-            # Plot update periods as vertical lines
-            for _, update_row in update_df.iterrows():
-                ax_combined.axvline(x=update_row['timestamp'], color='red', alpha=0.7, 
-                                  linestyle='--', label='Update Start' if _ == 0 else "")
+            # Plot update periods as vertical lines spanning the full axis height
+            ax_combined.vlines(update_df['timestamp'].values, 0, 1, transform=ax_combined.get_xaxis_transform(),
+                               colors='red', alpha=0.7, linestyles='--', label='Update Start')
             
             ax_combined.set_title('Search Performance vs Update Timeline')
             ax_combined.set_ylabel('Search Duration (ms)')
@@ -241,7 +400,8 @@ def create_visualizations(update_df, search_df):
         print("✓ Visualizations saved to 'performance_analysis.png'")
         
         # Show plot
-        plt.show()
+        if matplotlib.get_backend().lower() != 'agg':
+            plt.show()
         
     except ImportError:
         print("matplotlib not available - skipping visualizations")
@@ -258,11 +418,14 @@ def main():
     if update_df is None or search_df is None:
         return
     
+    # Successful searches are shared by every analysis step
+    successful_searches = search_df[search_df['success'].to_numpy()]
+    
     # Perform analysis
-    analyze_search_performance(search_df)
+    analyze_search_performance(search_df, successful_searches)
     analyze_update_performance(update_df)
-    correlation_analysis(update_df, search_df)
-    create_visualizations(update_df, search_df)
+    correlation_analysis(update_df, search_df, successful_searches)
+    create_visualizations(update_df, search_df, successful_searches)
     
     print("\n" + "=" * 60)
     print("SUMMARY")
@@ -4,16 +4,21 @@ Script to create OpenSearch index for Instruments
 """
 
 from opensearchpy import OpenSearch
+import functools
 import json
 
+@functools.lru_cache(maxsize=None)
 def create_opensearch_client():
-    """Create OpenSearch client"""
+    """Create OpenSearch client (cached: the connection test and index creation share it)"""
     client = OpenSearch(
         hosts=[{'host': 'localhost', 'port': 9200}],
         http_auth=None,  # No authentication since we disabled security
         use_ssl=False,
         verify_certs=False,
         ssl_show_warn=False,
+        timeout=60,
+        retry_on_timeout=True,
+        max_retries=3,
     )
     return client
 
@@ -44,6 +49,9 @@ def create_instrument_index():
                         }
                     }
                 },
+                "long_name_length": {
+                    "type": "integer"  # Precomputed so length filters don't need scripts
+                },
                 "price": {
                     "type": "scaled_float",
                     "scaling_factor": 100  # For price precision (2 decimal places)
@@ -14,6 +14,10 @@ def create_opensearch_client():
         use_ssl=False,
         verify_certs=False,
         ssl_show_warn=False,
+        http_compress=True,  # gzip request and response bodies
+        pool_maxsize=32,
+        timeout=30,
+        retry_on_timeout=True,
     )
     return client
 
@@ -61,42 +65,48 @@ def demo_long_names():
             'type': 'Long Name Length Filter',
             'query': {
                 "query": {
-                    "script": {
-                        "script": {
-                            "source": "doc['long_name.keyword'].value.length() > 150"
-                        }
+                    "range": {
+                        "long_name_length": {"gt": 150}
                     }
                 },
+                "terminate_after": 10000,  # Cap per-shard work, only a sample is shown
                 "size": 3
             }
         }
     ]
     
+    # Run all searches in a single multi-search round-trip
+    body = []
     for search in searches:
+        body.append({"index": "instruments"})
+        body.append(dict(search['query'], _source=["isin", "name", "long_name", "price"]))  # Only the fields printed below
+    
+    try:
+        responses = client.msearch(body=body)['responses']
+    except Exception as e:
+        responses = [{'error': str(e)}] * len(searches)
+    
+    for search, response in zip(searches, responses):
         print(f"\n{search['type']}:")
         print("-" * 20)
         
-        try:
-            response = client.search(
-                index="instruments",
-                body=search['query']
-            )
+        if 'error' in response:
+            print(f"Error: {response['error']}")
+            continue
+        
+        if response['hits']['total']['value'] > 0:
+            at_least = "at least " if response.get('terminated_early') else ""
+            print(f"Found {at_least}{response['hits']['total']['value']} results")
             
-            if response['hits']['total']['value'] > 0:
-                print(f"Found {response['hits']['total']['value']} results")
-                
-                for i, hit in enumerate(response['hits']['hits'], 1):
-                    source = hit['_source']
-                    print(f"\n{i}. ISIN: {source['isin']}")
-                    print(f"   Name: {source['name']}")
-                    print(f"   Long Name: {source.get('long_name', 'N/A')}")
-                    print(f"   Price: ${source['price']:.2f}")
-                    print(f"   Long Name Length: {len(source.get('long_name', ''))}")
-            else:
-                print("No results found")
-                
-        except Exception as e:
-            print(f"Error: {e}")
+            for i, hit in enumerate(response['hits']['hits'], 1):
+                source = hit['_source']
+                print(f"\n{i}. ISIN: {source['isin']}")
+                print(f"   Name: {source['name']}")
+                print(f"   Long Name: {source.get('long_name', 'N/A')}")
+                print(f"   Price: ${source['price']:.2f}")
+                print(f"   Long Name Length: {len(source.get('long_name', ''))}")
+        else:
+            print("No results found")
     
     # Show statistics
     print(f"\n\nStatistics:")
@@ -116,9 +126,7 @@ def demo_long_names():
                 "aggs": {
                     "long_name_stats": {
                         "stats": {
-                            "script": {
-                                "source": "doc['long_name.keyword'].value.length()"
-                            }
+                            "field": "long_name_length"
                         }
                     }
                 },
@@ -3,190 +3,347 @@
 Script to generate random test data for instruments
 """
 
-import pandas as pd
-import random
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.csv as pa_csv
+import functools
+import math
 import string
 from decimal import Decimal
 
-def generate_isin(country_code="US"):
-    """Generate a realistic ISIN code"""
+try:
+    from numba import njit, prange
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+
+# Single-byte lookup tables used by the vectorized ISIN generator
+ALPHANUMERIC = np.frombuffer((string.ascii_uppercase + string.digits).encode(), dtype='S1')
+DIGITS = np.frombuffer(string.digits.encode(), dtype='S1')
+
+def _draw_isins(num_candidates, countries, rng):
+    """Draw candidate ISIN codes as a packed S12 array"""
     # ISIN format: 2 letter country code + 9 alphanumeric characters + 1 check digit
     # For simplicity, we'll generate the first 11 characters and use a random check digit
-    alphanumeric = string.ascii_uppercase + string.digits
-    security_identifier = ''.join(random.choices(alphanumeric, k=9))
-    check_digit = random.randint(0, 9)
-    return f"{country_code}{security_identifier}{check_digit}"
-
-def generate_instrument_name():
-    """Generate realistic instrument names"""
-    prefixes = [
-        "Global", "International", "Advanced", "Dynamic", "Strategic", "Premier", 
-        "Elite", "Innovative", "Sustainable", "Digital", "Smart", "Future",
-        "Alpha", "Beta", "Gamma", "Delta", "Omega", "Prime", "Core", "Edge"
-    ]
+    country_chars = np.array([list(country.encode()) for country in countries], dtype=np.uint8).view('S1')
     
-    companies = [
-        "TechCorp", "DataSystems", "CloudVentures", "BioMedical", "EnergyPlus",
-        "FinanceGroup", "ManufacturingCo", "RetailChain", "TransportHub", "MediaWorks",
-        "HealthServices", "ConsumerGoods", "IndustrialSolutions", "AgriTech", "RealEstate",
-        "Telecommunications", "Automotive", "Aerospace", "Pharmaceuticals", "Utilities"
-    ]
+    # Write every part straight into one contiguous buffer of 12-character rows
+    buffer = np.empty((num_candidates, 12), dtype='S1')
+    buffer[:, :2] = country_chars[rng.integers(0, len(countries), num_candidates)]
+    buffer[:, 2:11] = ALPHANUMERIC[rng.integers(0, len(ALPHANUMERIC), size=(num_candidates, 9), dtype=np.uint8)]
+    buffer[:, 11] = DIGITS[rng.integers(0, len(DIGITS), num_candidates)]
     
-    suffixes = [
-        "Holdings", "Industries", "Solutions", "Technologies", "Systems", "Services",
-        "Group", "Corporation", "Enterprises", "Partners", "Ventures", "International",
-        "Global", "Limited", "Inc", "LLC", "AG", "SA", "PLC", "GmbH"
-    ]
+    return buffer.view('S12').ravel()
+
+def generate_isins(num_isins, countries, rng):
+    """Generate unique realistic ISIN codes in vectorized batches"""
+    # Collisions are rare (36^9 identifiers per country), so 1% headroom almost always suffices
+    isins = _draw_isins(math.ceil(num_isins * 1.01), countries, rng)
     
-    # Generate different types of instrument names
-    name_types = [
-        f"{random.choice(prefixes)} {random.choice(companies)} {random.choice(suffixes)}",
-        f"{random.choice(companies)} {random.choice(suffixes)}",
-        f"{random.choice(prefixes)} {random.choice(companies)}",
-        f"{random.choice(companies)} {random.choice(prefixes)} {random.choice(suffixes)}"
-    ]
+    while True:
+        # Keep the first occurrence of each code, preserving generation order
+        _, first_index = np.unique(isins, return_index=True)
+        missing = num_isins - len(first_index)
+        if missing <= 0:
+            break
+        isins = np.concatenate([isins, _draw_isins(math.ceil(missing * 1.01), countries, rng)])
     
-    return random.choice(name_types)
-
-def generate_long_instrument_name():
-    """Generate long realistic instrument names (100-200 characters)"""
-    
-    # Extended components for longer names
-    business_areas = [
-        "Financial Services", "Investment Banking", "Asset Management", "Private Equity",
-        "Venture Capital", "Real Estate Investment", "Infrastructure Development",
-        "Technology Innovation", "Digital Transformation", "Artificial Intelligence",
-        "Machine Learning", "Data Analytics", "Cloud Computing", "Cybersecurity",
-        "Biotechnology Research", "Pharmaceutical Development", "Medical Devices",
-        "Healthcare Solutions", "Renewable Energy", "Solar Power Generation",
-        "Wind Energy Systems", "Energy Storage Solutions", "Smart Grid Technology",
-        "Transportation Services", "Logistics Management", "Supply Chain Solutions"
-    ]
+    return isins[np.sort(first_index)[:num_isins]].astype(str)
+
+INSTRUMENT_NAME_PREFIXES = [
+    "Global", "International", "Advanced", "Dynamic", "Strategic", "Premier", 
+    "Elite", "Innovative", "Sustainable", "Digital", "Smart", "Future",
+    "Alpha", "Beta", "Gamma", "Delta", "Omega", "Prime", "Core", "Edge"
+]
+
+INSTRUMENT_NAME_COMPANIES = [
+    "TechCorp", "DataSystems", "CloudVentures", "BioMedical", "EnergyPlus",
+    "FinanceGroup", "ManufacturingCo", "RetailChain", "TransportHub", "MediaWorks",
+    "HealthServices", "ConsumerGoods", "IndustrialSolutions", "AgriTech", "RealEstate",
+    "Telecommunications", "Automotive", "Aerospace", "Pharmaceuticals", "Utilities"
+]
+
+INSTRUMENT_NAME_SUFFIXES = [
+    "Holdings", "Industries", "Solutions", "Technologies", "Systems", "Services",
+    "Group", "Corporation", "Enterprises", "Partners", "Ventures", "International",
+    "Global", "Limited", "Inc", "LLC", "AG", "SA", "PLC", "GmbH"
+]
+
+# Different types of instrument names
+INSTRUMENT_NAME_PATTERNS = [
+    "{prefix} {company} {suffix}",
+    "{company} {suffix}",
+    "{prefix} {company}",
+    "{company} {prefix} {suffix}"
+]
+INSTRUMENT_NAME_USES_PREFIX = np.array(["{prefix}" in pattern for pattern in INSTRUMENT_NAME_PATTERNS])
+INSTRUMENT_NAME_USES_SUFFIX = np.array(["{suffix}" in pattern for pattern in INSTRUMENT_NAME_PATTERNS])
+
+@functools.lru_cache(maxsize=None)
+def _format_instrument_name(pattern_id, prefix_id, company_id, suffix_id):
+    """Format an instrument name from component indices, memoized per combination"""
+    return INSTRUMENT_NAME_PATTERNS[pattern_id].format(
+        prefix=INSTRUMENT_NAME_PREFIXES[prefix_id],
+        company=INSTRUMENT_NAME_COMPANIES[company_id],
+        suffix=INSTRUMENT_NAME_SUFFIXES[suffix_id]
+    )
+
+def generate_instrument_names(num_names, rng):
+    """Generate realistic instrument names in bulk"""
+    pattern_ids = rng.integers(0, len(INSTRUMENT_NAME_PATTERNS), num_names)
+    prefix_ids = rng.integers(0, len(INSTRUMENT_NAME_PREFIXES), num_names)
+    company_ids = rng.integers(0, len(INSTRUMENT_NAME_COMPANIES), num_names)
+    suffix_ids = rng.integers(0, len(INSTRUMENT_NAME_SUFFIXES), num_names)
     
-    geographic_regions = [
-        "North America", "Europe", "Asia-Pacific", "Latin America", "Middle East",
-        "Scandinavia", "Eastern Europe", "Southeast Asia", "Sub-Saharan Africa",
-        "Western Europe", "Central Asia", "Caribbean", "Pacific Islands",
-        "Mediterranean", "Baltic States", "Nordic Region", "Emerging Markets"
-    ]
+    # Reset components a pattern doesn't use so equal names share a cache entry
+    prefix_ids[~INSTRUMENT_NAME_USES_PREFIX[pattern_ids]] = 0
+    suffix_ids[~INSTRUMENT_NAME_USES_SUFFIX[pattern_ids]] = 0
     
-    fund_types = [
-        "Equity Fund", "Bond Fund", "Hybrid Fund", "Index Fund", "ETF",
-        "Mutual Fund", "Hedge Fund", "Private Equity Fund", "Real Estate Fund",
-        "Infrastructure Fund", "Commodity Fund", "Currency Fund", "Derivatives Fund",
-        "Alternative Investment Fund", "Sustainable Investment Fund", "Impact Fund"
+    return [
+        _format_instrument_name(*key)
+        for key in zip(pattern_ids.tolist(), prefix_ids.tolist(), company_ids.tolist(), suffix_ids.tolist())
     ]
+
+# Extended components for longer names
+BUSINESS_AREAS = np.array([
+    "Financial Services", "Investment Banking", "Asset Management", "Private Equity",
+    "Venture Capital", "Real Estate Investment", "Infrastructure Development",
+    "Technology Innovation", "Digital Transformation", "Artificial Intelligence",
+    "Machine Learning", "Data Analytics", "Cloud Computing", "Cybersecurity",
+    "Biotechnology Research", "Pharmaceutical Development", "Medical Devices",
+    "Healthcare Solutions", "Renewable Energy", "Solar Power Generation",
+    "Wind Energy Systems", "Energy Storage Solutions", "Smart Grid Technology",
+    "Transportation Services", "Logistics Management", "Supply Chain Solutions"
+], dtype=object)
+
+GEOGRAPHIC_REGIONS = np.array([
+    "North America", "Europe", "Asia-Pacific", "Latin America", "Middle East",
+    "Scandinavia", "Eastern Europe", "Southeast Asia", "Sub-Saharan Africa",
+    "Western Europe", "Central Asia", "Caribbean", "Pacific Islands",
+    "Mediterranean", "Baltic States", "Nordic Region", "Emerging Markets"
+], dtype=object)
+
+FUND_TYPES = np.array([
+    "Equity Fund", "Bond Fund", "Hybrid Fund", "Index Fund", "ETF",
+    "Mutual Fund", "Hedge Fund", "Private Equity Fund", "Real Estate Fund",
+    "Infrastructure Fund", "Commodity Fund", "Currency Fund", "Derivatives Fund",
+    "Alternative Investment Fund", "Sustainable Investment Fund", "Impact Fund"
+], dtype=object)
+
+INVESTMENT_STRATEGIES = np.array([
+    "Growth Strategy", "Value Strategy", "Momentum Strategy", "Dividend Strategy",
+    "Quality Strategy", "Low Volatility Strategy", "High Yield Strategy",
+    "Multi-Factor Strategy", "ESG Strategy", "Quantitative Strategy",
+    "Fundamental Analysis Strategy", "Technical Analysis Strategy",
+    "Market Neutral Strategy", "Long Short Strategy", "Arbitrage Strategy"
+], dtype=object)
+
+ADDITIONAL_DETAILS = np.array([
+    "with Professional Management", "and Institutional Grade Infrastructure",
+    "featuring Advanced Analytics", "and Regulatory Compliance",
+    "including ESG Integration", "and Transparent Reporting",
+    "with Daily Liquidity", "and Competitive Fee Structure"
+], dtype=object)
+
+# Different patterns of long names: literal text interleaved with category slots
+LONG_NAME_PATTERNS = [
+    (BUSINESS_AREAS, " ", GEOGRAPHIC_REGIONS, " ", FUND_TYPES, " - ", INVESTMENT_STRATEGIES,
+     " with Enhanced Risk Management and Diversified Portfolio Allocation"),
     
-    investment_strategies = [
-        "Growth Strategy", "Value Strategy", "Momentum Strategy", "Dividend Strategy",
-        "Quality Strategy", "Low Volatility Strategy", "High Yield Strategy",
-        "Multi-Factor Strategy", "ESG Strategy", "Quantitative Strategy",
-        "Fundamental Analysis Strategy", "Technical Analysis Strategy",
-        "Market Neutral Strategy", "Long Short Strategy", "Arbitrage Strategy"
-    ]
+    ("International ", BUSINESS_AREAS, " and ", BUSINESS_AREAS, " ", FUND_TYPES, " focused on ",
+     GEOGRAPHIC_REGIONS, " Markets with Sustainable Investment Approach"),
     
-    # Generate different patterns of long names
-    patterns = [
-        f"{random.choice(business_areas)} {random.choice(geographic_regions)} {random.choice(fund_types)} - {random.choice(investment_strategies)} with Enhanced Risk Management and Diversified Portfolio Allocation",
-        
-        f"International {random.choice(business_areas)} and {random.choice(business_areas)} {random.choice(fund_types)} focused on {random.choice(geographic_regions)} Markets with Sustainable Investment Approach",
-        
-        f"{random.choice(geographic_regions)} {random.choice(business_areas)} {random.choice(fund_types)} implementing {random.choice(investment_strategies)} and Advanced Portfolio Optimization Techniques",
-        
-        f"Global {random.choice(business_areas)} Investment Platform featuring {random.choice(fund_types)} with {random.choice(investment_strategies)} and Multi-Asset Class Diversification",
-        
-        f"{random.choice(fund_types)} for {random.choice(geographic_regions)} {random.choice(business_areas)} Sector with Focus on {random.choice(investment_strategies)} and Long-Term Value Creation",
+    (GEOGRAPHIC_REGIONS, " ", BUSINESS_AREAS, " ", FUND_TYPES, " implementing ", INVESTMENT_STRATEGIES,
+     " and Advanced Portfolio Optimization Techniques"),
+    
+    ("Global ", BUSINESS_AREAS, " Investment Platform featuring ", FUND_TYPES, " with ",
+     INVESTMENT_STRATEGIES, " and Multi-Asset Class Diversification"),
+    
+    (FUND_TYPES, " for ", GEOGRAPHIC_REGIONS, " ", BUSINESS_AREAS, " Sector with Focus on ",
+     INVESTMENT_STRATEGIES, " and Long-Term Value Creation"),
+    
+    ("Diversified ", BUSINESS_AREAS, " and ", BUSINESS_AREAS, " ", FUND_TYPES, " targeting ",
+     GEOGRAPHIC_REGIONS, " with ", INVESTMENT_STRATEGIES),
+    
+    ("Strategic ", BUSINESS_AREAS, " Investment ", FUND_TYPES, " for ", GEOGRAPHIC_REGIONS,
+     " Markets emphasizing ", INVESTMENT_STRATEGIES, " and Risk-Adjusted Returns")
+]
+
+def _compile_long_name_patterns():
+    """Flatten long name patterns into a padded byte table of text pieces"""
+    pieces = []
+    offsets = {}
+    pattern_slots = []
+    
+    # Every slot becomes (first piece id, number of choices); literals have one choice
+    for pattern in LONG_NAME_PATTERNS:
+        slots = []
+        for part in pattern:
+            key = part if isinstance(part, str) else id(part)
+            if key not in offsets:
+                offsets[key] = len(pieces)
+                pieces.extend([part] if isinstance(part, str) else part.tolist())
+            slots.append((offsets[key], 1 if isinstance(part, str) else len(part)))
+        pattern_slots.append(slots)
+    
+    # Additional details carry their separating space so they can be appended as-is
+    details_offset = len(pieces)
+    pieces.extend(" " + detail for detail in ADDITIONAL_DETAILS)
+    
+    piece_lengths = np.array([len(piece) for piece in pieces], dtype=np.int64)
+    piece_bytes = np.zeros((len(pieces), piece_lengths.max()), dtype=np.uint8)
+    for piece_id, piece in enumerate(pieces):
+        piece_bytes[piece_id, :len(piece)] = np.frombuffer(piece.encode(), dtype=np.uint8)
+    
+    # Widest possible name: the longest pattern, or a short one topped up with a detail
+    max_pattern_length = max(
+        sum(piece_lengths[offset:offset + choices].max() for offset, choices in slots)
+        for slots in pattern_slots
+    )
+    max_detail_length = piece_lengths[details_offset:].max()
+    width = int(max(max_pattern_length, 99 + max_detail_length))
+    max_details = int(-(-100 // piece_lengths[details_offset:].min()))
+    
+    return piece_bytes, piece_lengths, pattern_slots, details_offset, width, max_details
+
+(LONG_NAME_PIECE_BYTES, LONG_NAME_PIECE_LENGTHS, LONG_NAME_PATTERN_SLOTS,
+ LONG_NAME_DETAILS_OFFSET, LONG_NAME_WIDTH, LONG_NAME_MAX_DETAILS) = _compile_long_name_patterns()
+
+def _build_long_names(piece_bytes, piece_lengths, row_pieces, detail_pieces, out):
+    """Copy the picked pieces of every row into a fixed-width byte buffer"""
+    for i in prange(row_pieces.shape[0]):
+        pos = 0
+        for slot in range(row_pieces.shape[1]):
+            piece = row_pieces[i, slot]
+            if piece < 0:
+                break
+            length = piece_lengths[piece]
+            out[i, pos:pos + length] = piece_bytes[piece, :length]
+            pos += length
         
-        f"Diversified {random.choice(business_areas)} and {random.choice(business_areas)} {random.choice(fund_types)} targeting {random.choice(geographic_regions)} with {random.choice(investment_strategies)}",
+        # Add more details to reach minimum length
+        detail = 0
+        while pos < 100:
+            piece = detail_pieces[i, detail]
+            length = piece_lengths[piece]
+            out[i, pos:pos + length] = piece_bytes[piece, :length]
+            pos += length
+            detail += 1
         
-        f"Strategic {random.choice(business_areas)} Investment {random.choice(fund_types)} for {random.choice(geographic_regions)} Markets emphasizing {random.choice(investment_strategies)} and Risk-Adjusted Returns"
-    ]
+        # Trim if too long
+        if pos > 200:
+            out[i, 197:200] = 46  # "..."
+            out[i, 200:pos] = 0
+
+if NUMBA_AVAILABLE:
+    _build_long_names = njit(parallel=True, cache=True)(_build_long_names)
+
+def _generate_long_instrument_names_numba(num_names, rng):
+    """Generate long instrument names with the parallel Numba kernel"""
+    pattern_ids = rng.integers(0, len(LONG_NAME_PATTERN_SLOTS), num_names)
+    max_slots = max(len(slots) for slots in LONG_NAME_PATTERN_SLOTS)
+    
+    # Resolve every slot of every row to a piece id; -1 marks the end of a pattern
+    row_pieces = np.full((num_names, max_slots), -1, dtype=np.int64)
+    for pattern_id, slots in enumerate(LONG_NAME_PATTERN_SLOTS):
+        rows = np.flatnonzero(pattern_ids == pattern_id)
+        for slot, (offset, choices) in enumerate(slots):
+            row_pieces[rows, slot] = offset + rng.integers(0, choices, len(rows))
+    
+    num_details = len(LONG_NAME_PIECE_LENGTHS) - LONG_NAME_DETAILS_OFFSET
+    detail_pieces = LONG_NAME_DETAILS_OFFSET + rng.integers(0, num_details, (num_names, LONG_NAME_MAX_DETAILS))
+    
+    out = np.zeros((num_names, LONG_NAME_WIDTH), dtype=np.uint8)
+    _build_long_names(LONG_NAME_PIECE_BYTES, LONG_NAME_PIECE_LENGTHS, row_pieces, detail_pieces, out)
+    return out.view(f'S{LONG_NAME_WIDTH}').ravel().astype(str)
+
+def generate_long_instrument_names(num_names, rng):
+    """Generate long realistic instrument names (100-200 characters) in bulk"""
+    if NUMBA_AVAILABLE:
+        return _generate_long_instrument_names_numba(num_names, rng)
+    
+    pattern_ids = rng.integers(0, len(LONG_NAME_PATTERNS), num_names)
+    long_names = np.empty(num_names, dtype=object)
+    
+    # Assemble every row of a pattern at once; object arrays concatenate element-wise
+    for pattern_id, pattern in enumerate(LONG_NAME_PATTERNS):
+        mask = pattern_ids == pattern_id
+        count = int(mask.sum())
+        names = np.full(count, "", dtype=object)
+        for part in pattern:
+            if isinstance(part, str):
+                names = names + part
+            else:
+                names = names + part[rng.integers(0, len(part), count)]
+        long_names[mask] = names
     
-    long_name = random.choice(patterns)
+    lengths = np.fromiter(map(len, long_names), dtype=np.int64, count=num_names)
     
-    # Ensure the name is within 100-200 characters
-    if len(long_name) < 100:
+    # Ensure the names are within 100-200 characters
+    short = np.flatnonzero(lengths < 100)
+    while len(short) > 0:
         # Add more details to reach minimum length
-        additional_details = [
-            "with Professional Management", "and Institutional Grade Infrastructure",
-            "featuring Advanced Analytics", "and Regulatory Compliance",
-            "including ESG Integration", "and Transparent Reporting",
-            "with Daily Liquidity", "and Competitive Fee Structure"
-        ]
-        while len(long_name) < 100:
-            long_name += f" {random.choice(additional_details)}"
+        details = " " + ADDITIONAL_DETAILS[rng.integers(0, len(ADDITIONAL_DETAILS), len(short))]
+        long_names[short] = long_names[short] + details
+        lengths[short] += np.fromiter(map(len, details), dtype=np.int64, count=len(short))
+        short = short[lengths[short] < 100]
     
     # Trim if too long
-    if len(long_name) > 200:
-        long_name = long_name[:197] + "..."
-    
-    return long_name
-
-def generate_price():
-    """Generate realistic stock prices"""
-    # Generate prices in different ranges to simulate various types of instruments
-    price_ranges = [
-        (1.0, 10.0),      # Penny stocks
-        (10.0, 50.0),     # Small cap
-        (50.0, 200.0),    # Mid cap
-        (200.0, 1000.0),  # Large cap
-        (1000.0, 5000.0)  # High-value stocks
-    ]
+    too_long = lengths > 200
+    if too_long.any():
+        long_names[too_long] = np.char.add(long_names[too_long].astype('U197'), "...").astype(object)
     
-    price_range = random.choice(price_ranges)
-    price = round(random.uniform(price_range[0], price_range[1]), 2)
-    return price
+    return long_names
+
+# Price ranges to simulate various types of instruments:
+# penny stocks, small cap, mid cap, large cap, high-value stocks
+PRICE_RANGE_LOWS = np.array([1.0, 10.0, 50.0, 200.0, 1000.0])
+PRICE_RANGE_HIGHS = np.array([10.0, 50.0, 200.0, 1000.0, 5000.0])
+
+def generate_prices(num_prices, rng):
+    """Generate realistic stock prices in bulk"""
+    range_ids = rng.integers(0, len(PRICE_RANGE_LOWS), num_prices)
+    return np.round(rng.uniform(PRICE_RANGE_LOWS[range_ids], PRICE_RANGE_HIGHS[range_ids]), 2)
 
 def create_test_data(num_instruments=50):
-    """Create test data for instruments"""
+    """Create columnar test data for instruments"""
     print(f"Generating {num_instruments} test instruments...")
     
-    instruments = []
-    used_isins = set()  # To ensure unique ISINs
+    rng = np.random.default_rng()
     
     countries = ["US", "GB", "DE", "FR", "JP", "CA", "AU", "CH", "NL", "SE"]
     
-    for i in range(num_instruments):
-        # Generate unique ISIN
-        while True:
-            country = random.choice(countries)
-            isin = generate_isin(country)
-            if isin not in used_isins:
-                used_isins.add(isin)
-                break
-        
-        # Generate instrument data
-        instrument = {
-            'isin': isin,
-            'name': generate_instrument_name(),
-            'long_name': generate_long_instrument_name(),
-            'price': generate_price()
-        }
-        
-        instruments.append(instrument)
-        
-        # Print progress
-        if (i + 1) % 5000 == 0:
-            print(f"Generated {i + 1} instruments...")
+    # Generate every column in bulk
+    isins = generate_isins(num_instruments, countries, rng)
+    names = generate_instrument_names(num_instruments, rng)
+    long_names = generate_long_instrument_names(num_instruments, rng)
+    prices = generate_prices(num_instruments, rng)
     
-    return instruments
+    return {
+        'isin': isins,
+        'name': names,
+        'long_name': long_names,
+        'price': prices
+    }
 
 def save_to_csv(instruments, filename="instruments_test_data.csv"):
-    """Save instruments data to CSV file"""
-    df = pd.DataFrame(instruments)
-    df.to_csv(filename, index=False)
-    print(f"\nSaved {len(instruments)} instruments to '{filename}'")
+    """Save columnar instruments data to CSV file"""
+    table = pa.table(instruments)
+    pa_csv.write_csv(table, filename, write_options=pa_csv.WriteOptions(include_header=True))
+    print(f"\nSaved {table.num_rows} instruments to '{filename}'")
     
     # Display sample data
     print("\nSample data:")
-    print(df.head(10).to_string(index=False))
+    print(table.slice(0, 10).to_pandas().to_string(index=False))
     
     # Display statistics
+    price_stats = pc.min_max(table['price'])
     print(f"\nData Statistics:")
-    print(f"Total instruments: {len(df)}")
-    print(f"Price range: ${df['price'].min():.2f} - ${df['price'].max():.2f}")
-    print(f"Average price: ${df['price'].mean():.2f}")
-    print(f"Unique countries: {len(set(isin[:2] for isin in df['isin']))}")
+    print(f"Total instruments: {table.num_rows}")
+    print(f"Price range: ${price_stats['min'].as_py():.2f} - ${price_stats['max'].as_py():.2f}")
+    print(f"Average price: ${pc.mean(table['price']).as_py():.2f}")
+    print(f"Unique countries: {len(pc.unique(pc.utf8_slice_codeunits(table['isin'], 0, 2)))}")
 
 if __name__ == "__main__":
     print("Step 2: Generating test data for instruments")
@@ -1,19 +1,38 @@
 #!/usr/bin/env python3
 """
 Price Updater Script - Continuously updates instrument prices
-Logs performance metrics to CSV for real-time analysis
+Logs performance metrics to a JSON lines file for analysis
 """
 
+import argparse
+import asyncio
 import pandas as pd
-import random
+import numpy as np
 import time
-import csv
+import json
+import itertools
 from datetime import datetime
 from opensearchpy import OpenSearch
-from opensearchpy.helpers import bulk
+from opensearchpy.exceptions import SerializationError
+from opensearchpy.serializer import JSONSerializer
+from opensearchpy.helpers import parallel_bulk
 import sys
 import signal
 
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+try:
+    # Needs opensearch-py's async extra (aiohttp)
+    from opensearchpy import AsyncOpenSearch
+    from opensearchpy.helpers import async_bulk
+    ASYNC_AVAILABLE = True
+except ImportError:
+    ASYNC_AVAILABLE = False
+
 # Global flag for graceful shutdown
 running = True
 
@@ -22,6 +41,27 @@ def signal_handler(signum, frame):
     print(f"\nReceived signal {signum}. Shutting down gracefully...")
     running = False
 
+class OrjsonSerializer(JSONSerializer):
+    """JSON serializer backed by orjson, with the stock serializer's behaviour"""
+    
+    def loads(self, s):
+        try:
+            return orjson.loads(s)
+        except orjson.JSONDecodeError as e:
+            raise SerializationError(s, e)
+    
+    def dumps(self, data):
+        # Pre-encoded bodies are sent as-is
+        if isinstance(data, (str, bytes)):
+            return data
+        try:
+            # str like JSONSerializer, since the bulk helpers measure and join actions as str;
+            # default() still covers Decimal, dates and the other types orjson lacks
+            return orjson.dumps(data, default=self.default,
+                                option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS).decode()
+        except orjson.JSONEncodeError as e:
+            raise SerializationError(data, e)
+
 def create_opensearch_client():
     """Create OpenSearch client"""
     client = OpenSearch(
@@ -30,6 +70,29 @@ def create_opensearch_client():
         use_ssl=False,
         verify_certs=False,
         ssl_show_warn=False,
+        http_compress=True,  # gzip request bodies, bulk payloads compress well
+        pool_maxsize=16,  # Keep-alive sockets for every parallel_bulk thread
+        timeout=60,
+        retry_on_timeout=True,
+        max_retries=3,
+        serializer=OrjsonSerializer() if ORJSON_AVAILABLE else JSONSerializer(),
+    )
+    return client
+
+def create_async_opensearch_client():
+    """Create asyncio OpenSearch client for concurrent bulk requests"""
+    client = AsyncOpenSearch(
+        hosts=[{'host': 'localhost', 'port': 9200}],
+        http_auth=None,
+        use_ssl=False,
+        verify_certs=False,
+        ssl_show_warn=False,
+        http_compress=True,
+        maxsize=16,  # Keep-alive sockets for every concurrent bulk task
+        timeout=60,
+        retry_on_timeout=True,
+        max_retries=3,
+        serializer=OrjsonSerializer() if ORJSON_AVAILABLE else JSONSerializer(),
     )
     return client
 
@@ -38,37 +101,24 @@ def get_all_instruments(client, index_name="instruments"):
     print("Fetching all instrument ISINs...")
     
     try:
-        # Use scroll API to get all documents
-        response = client.search(
-            index=index_name,
-            body={
-                "query": {"match_all": {}},
-                "_source": ["isin"],
-                "size": 10000  # Get 10k at a time
-            },
-            scroll="5m"
-        )
+        # Page through the index with search_after on the isin keyword; _id equals
+        # the ISIN, so no _source has to be fetched or parsed
+        body = {
+            "query": {"match_all": {}},
+            "_source": False,
+            "track_total_hits": False,  # Pages are consumed until short, the total is never needed
+            "size": 10000,  # Get 10k at a time, the default index.max_result_window
+            "sort": [{"isin": "asc"}]
+        }
         
         isins = []
-        scroll_id = response.get('_scroll_id')
-        
-        # Get first batch
-        for hit in response['hits']['hits']:
-            isins.append(hit['_source']['isin'])
-        
-        # Get remaining batches
-        while len(response['hits']['hits']) > 0:
-            response = client.scroll(
-                scroll_id=scroll_id,
-                scroll="5m"
-            )
+        while True:
+            hits = client.search(index=index_name, body=body)['hits']['hits']
+            isins.extend(hit['_id'] for hit in hits)
             
-            for hit in response['hits']['hits']:
-                isins.append(hit['_source']['isin'])
-        
-        # Clean up scroll
-        if scroll_id:
-            client.clear_scroll(scroll_id=scroll_id)
+            if len(hits) < body["size"]:
+                break
+            body["search_after"] = hits[-1]['sort']
         
         print(f"✓ Found {len(isins)} instruments")
         return isins
@@ -77,27 +127,27 @@ def get_all_instruments(client, index_name="instruments"):
         print(f"✗ Error fetching instruments: {e}")
         return []
 
-def generate_random_price():
-    """Generate a random price similar to the original generation logic"""
-    price_ranges = [
-        (1.0, 10.0),      # Penny stocks
-        (10.0, 50.0),     # Small cap
-        (50.0, 200.0),    # Mid cap
-        (200.0, 1000.0),  # Large cap
-        (1000.0, 5000.0)  # High-value stocks
-    ]
-    
-    price_range = random.choice(price_ranges)
-    price = round(random.uniform(price_range[0], price_range[1]), 2)
-    return price
+# Price ranges similar to the original generation logic:
+# penny stocks, small cap, mid cap, large cap, high-value stocks
+PRICE_RANGE_LOWS = np.array([1.0, 10.0, 50.0, 200.0, 1000.0])
+PRICE_RANGE_HIGHS = np.array([10.0, 50.0, 200.0, 1000.0, 5000.0])
+
+rng = np.random.default_rng()
+
+def generate_random_prices(count):
+    """Generate random prices for all instruments in one vectorized draw"""
+    range_ids = rng.integers(0, len(PRICE_RANGE_LOWS), count)
+    lows = PRICE_RANGE_LOWS[range_ids]
+    return np.round(lows + rng.random(count) * (PRICE_RANGE_HIGHS[range_ids] - lows), 2)
 
 def prepare_price_updates(isins, iteration_number):
     """Prepare bulk update actions for price changes"""
     actions = []
     
-    for isin in isins:
-        new_price = generate_random_price()
-        
+    # One timestamp per iteration
+    updated_at = datetime.now().isoformat()
+    
+    for isin, new_price in zip(isins, generate_random_prices(len(isins)).tolist()):
         action = {
             "_op_type": "update",
             "_index": "instruments",
@@ -105,7 +155,7 @@ def prepare_price_updates(isins, iteration_number):
             "_source": {
                 "doc": {
                     "price": new_price,
-                    "updated_at": datetime.now().isoformat(),
+                    "updated_at": updated_at,
                     "update_iteration": iteration_number
                 }
             }
@@ -114,33 +164,29 @@ def prepare_price_updates(isins, iteration_number):
     
     return actions
 
-def bulk_update_prices(client, actions, batch_size=1000):
-    """Perform bulk price updates"""
+def bulk_update_prices(client, actions, thread_count=8, chunk_size=1000):
+    """Perform bulk price updates with parallel bulk requests"""
     start_time = time.time()
     
     try:
         success_count = 0
         error_count = 0
         
-        # Process in batches
-        total_batches = (len(actions) + batch_size - 1) // batch_size
+        # Stop feeding new actions once a graceful shutdown was requested
+        pending_actions = itertools.takewhile(lambda _: running, actions)
         
-        for i in range(0, len(actions), batch_size):
-            if not running:  # Check for graceful shutdown
-                break
-                
-            batch = actions[i:i+batch_size]
-            batch_num = i // batch_size + 1
-            
-            print(f"  Updating batch {batch_num}/{total_batches} "
-                  f"(records {i+1}-{min(i+batch_size, len(actions))})")
+        # Chunks are sent concurrently from a thread pool; ~200 byte update docs
+        # keep each chunk far below max_chunk_bytes
+        for ok, item in parallel_bulk(client, pending_actions, thread_count=thread_count, chunk_size=chunk_size,
+                                      max_chunk_bytes=50 * 1024 * 1024, queue_size=4, raise_on_error=False):
+            if ok:
+                success_count += 1
+            else:
+                error_count += 1
             
-            # Execute bulk operation
-            response = bulk(client, batch)
-            
-            success_count += response[0]
-            if response[1]:
-                error_count += len(response[1])
+            processed = success_count + error_count
+            if processed % (chunk_size * thread_count) == 0:
+                print(f"  Updated {processed}/{len(actions)} records")
         
         end_time = time.time()
         duration = end_time - start_time
@@ -151,44 +197,114 @@ def bulk_update_prices(client, actions, batch_size=1000):
         print(f"✗ Error during bulk update: {e}")
         return 0, len(actions), time.time() - start_time
 
-def log_performance_metrics(iteration, total_instruments, success_count, error_count, duration, csv_file="price_update_metrics.csv"):
-    """Log performance metrics to CSV"""
+async def async_bulk_update_prices(client, actions, concurrency=8, chunk_size=1000):
+    """Perform bulk price updates as concurrent asyncio bulk tasks"""
+    start_time = time.time()
     
-    # Check if file exists to write header
-    file_exists = False
     try:
-        with open(csv_file, 'r'):
-            file_exists = True
-    except FileNotFoundError:
-        pass
+        # Each task streams its own contiguous slice of the actions
+        slice_size = max(1, -(-len(actions) // concurrency))
+        tasks = [
+            async_bulk(client, itertools.takewhile(lambda _: running, actions[start:start + slice_size]),
+                       chunk_size=chunk_size, max_chunk_bytes=50 * 1024 * 1024,
+                       raise_on_error=False, stats_only=True)
+            for start in range(0, len(actions), slice_size)
+        ]
+        results = await asyncio.gather(*tasks)
+        
+        success_count = sum(ok for ok, _ in results)
+        error_count = sum(errors for _, errors in results)
+        print(f"  Updated {success_count + error_count}/{len(actions)} records")
+        
+        return success_count, error_count, time.time() - start_time
+        
+    except Exception as e:
+        print(f"✗ Error during async bulk update: {e}")
+        return 0, len(actions), time.time() - start_time
+
+# Painless script assigning every document a random price from the same ranges
+UPDATE_PRICE_SCRIPT = """
+int r = (int) (Math.random() * params.lows.length);
+double price = params.lows[r] + Math.random() * (params.highs[r] - params.lows[r]);
+ctx._source.price = Math.round(price * 100) / 100.0;
+ctx._source.updated_at = params.updated_at;
+ctx._source.update_iteration = params.iteration;
+"""
+
+def update_prices_by_query(client, iteration_number, total_instruments, index_name="instruments"):
+    """Randomize all prices server-side with a single update-by-query request"""
+    start_time = time.time()
     
-    # Write metrics
-    with open(csv_file, 'a', newline='') as f:
-        writer = csv.writer(f)
+    try:
+        response = client.update_by_query(
+            index=index_name,
+            body={
+                "query": {"match_all": {}},
+                "script": {
+                    "source": UPDATE_PRICE_SCRIPT,
+                    "lang": "painless",
+                    "params": {
+                        "lows": PRICE_RANGE_LOWS.tolist(),
+                        "highs": PRICE_RANGE_HIGHS.tolist(),
+                        "updated_at": datetime.now().isoformat(),
+                        "iteration": iteration_number
+                    }
+                }
+            },
+            conflicts="proceed",
+            slices="auto",  # Parallelize across shards on the server
+            wait_for_completion=True,
+            request_timeout=300
+        )
         
-        if not file_exists:
-            # Write header
-            writer.writerow([
-                'timestamp', 'iteration', 'total_instruments', 'success_count', 
-                'error_count', 'duration_seconds', 'updates_per_second'
-            ])
+        error_count = len(response.get('failures', [])) + response.get('version_conflicts', 0)
+        return response['updated'], error_count, time.time() - start_time
         
-        # Write data
-        updates_per_second = success_count / duration if duration > 0 else 0
-        writer.writerow([
-            datetime.now().isoformat(),
-            iteration,
-            total_instruments,
-            success_count,
-            error_count,
-            round(duration, 2),
-            round(updates_per_second, 2)
-        ])
+    except Exception as e:
+        print(f"✗ Error during update by query: {e}")
+        return 0, total_instruments, time.time() - start_time
+
+def open_metrics_log(log_file):
+    """Open the metrics log for binary appends"""
+    # One JSON object per line, flushed as each row is logged
+    return open(log_file, 'ab')
+
+def dump_json_line(row):
+    """Encode a metrics row as a JSON line"""
+    if ORJSON_AVAILABLE:
+        return orjson.dumps(row, option=orjson.OPT_APPEND_NEWLINE)
+    return json.dumps(row).encode() + b'\n'
+
+def log_performance_metrics(metrics_log, iteration, total_instruments, success_count, error_count, duration):
+    """Log performance metrics to the JSON lines log"""
+    updates_per_second = success_count / duration if duration > 0 else 0
+    metrics_log.write(dump_json_line({
+        'timestamp': datetime.now().isoformat(timespec='microseconds'),
+        'iteration': iteration,
+        'total_instruments': total_instruments,
+        'success_count': success_count,
+        'error_count': error_count,
+        'duration_seconds': round(duration, 2),
+        'updates_per_second': round(updates_per_second, 2)
+    }))
+    # Rows arrive every few seconds; flush each one so analysis sees a run in progress
+    metrics_log.flush()
+
+def parse_args():
+    """Parse command line options"""
+    parser = argparse.ArgumentParser(description="Continuously update instrument prices")
+    parser.add_argument("--update-by-query", action="store_true",
+                        help="randomize prices server-side with _update_by_query instead of client-side bulk updates")
+    parser.add_argument("--async-bulk", action="store_true",
+                        help="send bulk updates as concurrent asyncio tasks instead of a parallel_bulk thread pool")
+    return parser.parse_args()
 
 def main():
     """Main function to run continuous price updates"""
     global running
     
+    args = parse_args()
+    
     # Set up signal handlers for graceful shutdown
     signal.signal(signal.SIGINT, signal_handler)
     signal.signal(signal.SIGTERM, signal_handler)
@@ -207,18 +323,37 @@ def main():
         print(f"✗ Failed to connect to OpenSearch: {e}")
         return
     
-    # Get all instruments
-    isins = get_all_instruments(client)
-    if not isins:
+    if args.update_by_query:
+        # Prices are generated server-side, so only the document count is needed
+        isins = None
+        total_instruments = client.count(index="instruments")['count']
+        print("✓ Using server-side update by query")
+    else:
+        # Get all instruments
+        isins = get_all_instruments(client)
+        total_instruments = len(isins)
+    
+    if not total_instruments:
         print("✗ No instruments found. Please run the import script first.")
         return
     
-    print(f"✓ Will update {len(isins)} instruments continuously")
+    print(f"✓ Will update {total_instruments} instruments continuously")
     print()
     
-    # Initialize CSV file
-    csv_file = "price_update_metrics.csv"
-    print(f"✓ Logging metrics to: {csv_file}")
+    # One event loop for the whole run so the async client's connections are reused
+    async_loop = None
+    if args.async_bulk and not args.update_by_query:
+        if not ASYNC_AVAILABLE:
+            print("✗ --async-bulk needs the async client: pip install 'opensearch-py[async]'")
+            return
+        async_loop = asyncio.new_event_loop()
+        async_client = create_async_opensearch_client()
+        print("✓ Using asyncio bulk updates")
+    
+    # Initialize metrics log
+    metrics_file = "price_update_metrics.jsonl"
+    metrics_log = open_metrics_log(metrics_file)
+    print(f"✓ Logging metrics to: {metrics_file}")
     print()
     
     # Continuous update loop
@@ -228,14 +363,21 @@ def main():
         try:
             print(f"[{datetime.now().strftime('%H:%M:%S')}] Starting iteration {iteration}")
             
-            # Prepare updates
-            actions = prepare_price_updates(isins, iteration)
-            
-            # Perform bulk update
-            success_count, error_count, duration = bulk_update_prices(client, actions)
+            if args.update_by_query:
+                success_count, error_count, duration = update_prices_by_query(client, iteration, total_instruments)
+            else:
+                # Prepare updates
+                actions = prepare_price_updates(isins, iteration)
+                
+                # Perform bulk update
+                if async_loop:
+                    success_count, error_count, duration = async_loop.run_until_complete(
+                        async_bulk_update_prices(async_client, actions))
+                else:
+                    success_count, error_count, duration = bulk_update_prices(client, actions)
             
             # Log metrics
-            log_performance_metrics(iteration, len(isins), success_count, error_count, duration, csv_file)
+            log_performance_metrics(metrics_log, iteration, total_instruments, success_count, error_count, duration)
             
             # Print summary
             updates_per_second = success_count / duration if duration > 0 else 0
@@ -261,7 +403,11 @@ def main():
             time.sleep(5)
     
     print(f"\n🏁 Price updater stopped after {iteration-1} iterations")
-    print(f"📊 Metrics saved to: {csv_file}")
+    if async_loop:
+        async_loop.run_until_complete(async_client.close())
+        async_loop.close()
+    metrics_log.close()
+    print(f"📊 Metrics saved to: {metrics_file}")
 
 if __name__ == "__main__":
     main() 
\ No newline at end of file
@@ -16,9 +16,9 @@ def main():
     print("1. price_updater.py - Continuously updates all 50k instrument prices")
     print("2. search_performance.py - Continuously performs price range searches")
     print()
-    print("Both scripts will log metrics to separate CSV files:")
-    print("- price_update_metrics.csv - Update performance data")
-    print("- search_performance_metrics.csv - Search performance data")
+    print("Both scripts will log metrics to separate JSON lines files:")
+    print("- price_update_metrics.jsonl - Update performance data")
+    print("- search_performance_metrics.jsonl - Search performance data")
     print()
     print("Instructions:")
     print("1. Open two terminal windows")
@@ -68,9 +68,9 @@ def main():
             update_proc.wait()
             
             print("✓ Quick test completed!")
-            print("Check the CSV files for results:")
-            print("- price_update_metrics.csv")
-            print("- search_performance_metrics.csv")
+            print("Check the metrics files for results:")
+            print("- price_update_metrics.jsonl")
+            print("- search_performance_metrics.jsonl")
             
         except KeyboardInterrupt:
             print("\nTest interrupted by user")
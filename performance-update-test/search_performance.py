@@ -1,37 +1,120 @@
 #!/usr/bin/env python3
 """
 Search Performance Script - Continuously performs price range searches
-Logs performance metrics to CSV for real-time analysis
+Logs performance metrics to a JSON lines file for analysis
 """
 
-import random
+import argparse
+import asyncio
+import functools
 import time
-import csv
 from datetime import datetime
+import json
+import multiprocessing
+import os
+import queue
+import shutil
+import threading
+import numpy as np
 from opensearchpy import OpenSearch
+from opensearchpy.exceptions import SerializationError
+from opensearchpy.serializer import JSONSerializer
 import signal
 import sys
 
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+try:
+    # Needs opensearch-py's async extra (aiohttp)
+    from opensearchpy import AsyncOpenSearch
+    ASYNC_AVAILABLE = True
+except ImportError:
+    ASYNC_AVAILABLE = False
+
+# Price statistics drift as updates run, so they are re-fetched this often
+STATS_REFRESH_SECONDS = 300
+
+# Concurrency beyond this saturates a single node's search thread pool
+MAX_CONCURRENCY = 32
+
+# Stable routing key: every request of this tester hits the same shard copies,
+# so their filesystem, query and request caches stay warm between rounds
+SEARCH_PREFERENCE = "perf-tester"
+
+# Flush the metrics log every this many rows so it can be tailed during a run
+METRICS_FLUSH_ROWS = 100
+
 # Global flag for graceful shutdown
 running = True
 
+rng = np.random.default_rng()
+
 def signal_handler(signum, frame):
     global running
     print(f"\nReceived signal {signum}. Shutting down gracefully...")
     running = False
 
+class OrjsonSerializer(JSONSerializer):
+    """JSON serializer backed by orjson, with the stock serializer's behaviour"""
+    
+    def loads(self, s):
+        try:
+            return orjson.loads(s)
+        except orjson.JSONDecodeError as e:
+            raise SerializationError(s, e)
+    
+    def dumps(self, data):
+        # Pre-encoded bodies are sent as-is
+        if isinstance(data, (str, bytes)):
+            return data
+        try:
+            # str like JSONSerializer, since the bulk helpers measure and join actions as str;
+            # default() still covers Decimal, dates and the other types orjson lacks
+            return orjson.dumps(data, default=self.default,
+                                option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS).decode()
+        except orjson.JSONEncodeError as e:
+            raise SerializationError(data, e)
+
+@functools.lru_cache(maxsize=None)
 def create_opensearch_client():
-    """Create OpenSearch client"""
+    """Create OpenSearch client (cached, never recreate it per query)"""
     client = OpenSearch(
         hosts=[{'host': 'localhost', 'port': 9200}],
         http_auth=None,
         use_ssl=False,
         verify_certs=False,
         ssl_show_warn=False,
+        http_compress=True,
+        pool_maxsize=10,  # Keep-alive sockets reused by every search request
+        timeout=60,
+        retry_on_timeout=True,
+        max_retries=3,
+        serializer=OrjsonSerializer() if ORJSON_AVAILABLE else JSONSerializer(),
+    )
+    return client
+
+def create_async_opensearch_client(concurrency):
+    """Create asyncio OpenSearch client with one pooled connection per concurrent request"""
+    client = AsyncOpenSearch(
+        hosts=[{'host': 'localhost', 'port': 9200}],
+        http_auth=None,
+        use_ssl=False,
+        verify_certs=False,
+        ssl_show_warn=False,
+        http_compress=True,
+        maxsize=concurrency,
+        timeout=60,
+        retry_on_timeout=True,
+        max_retries=3,
+        serializer=OrjsonSerializer() if ORJSON_AVAILABLE else JSONSerializer(),
     )
     return client
 
-def get_price_statistics(client, index_name="instruments"):
+def get_price_statistics(client, index_name="instruments", fallback=None):
     """Get price statistics to generate meaningful search ranges"""
     try:
         response = client.search(
@@ -46,7 +129,9 @@ def get_price_statistics(client, index_name="instruments"):
                     }
                 },
                 "size": 0
-            }
+            },
+            preference=SEARCH_PREFERENCE,
+            request_cache=True
         )
         
         stats = response['aggregations']['price_stats']
@@ -58,296 +143,472 @@ def get_price_statistics(client, index_name="instruments"):
         
     except Exception as e:
         print(f"✗ Error getting price statistics: {e}")
-        # Return default ranges if stats fail
-        return {'min': 1.0, 'max': 5000.0, 'avg': 250.0}
+        # Keep the previous statistics, or return default ranges if stats fail
+        return fallback or {'min': 1.0, 'max': 5000.0, 'avg': 250.0}
 
-def generate_search_query(price_stats):
-    """Generate various types of search queries for testing"""
+def refresh_price_statistics(client, search_state):
+    """Re-fetch price statistics in the background and rebuild the search table"""
+    price_stats = get_price_statistics(client, fallback=search_state['current'][0])
+    # Swapped in as one tuple so the search loop never sees a mismatched pair
+    search_state['current'] = (price_stats, build_search_table(price_stats))
+
+# Price bounds are written as (statistic, scale, offset) and resolve to
+# price_stats[statistic] * scale + offset; NO_PRICE marks pure text searches
+MIN, AVG, MAX, NO_PRICE = 0, 1, 2, 3
+
+# Different types of search queries to test various scenarios
+SEARCH_TEMPLATES = (
+    # Price range searches
+    ('price_narrow_low', 'price_range', (MIN, 1, 0), (MIN, 1, 50), ''),
+    ('price_narrow_mid', 'price_range', (AVG, 1, -25), (AVG, 1, 25), ''),
+    ('price_narrow_high', 'price_range', (MAX, 1, -100), (MAX, 1, 0), ''),
+    ('price_medium_low', 'price_range', (MIN, 1, 0), (AVG, 0.5, 0), ''),
+    ('price_medium_mid', 'price_range', (AVG, 0.5, 0), (AVG, 1.5, 0), ''),
+    ('price_medium_high', 'price_range', (AVG, 1.5, 0), (MAX, 1, 0), ''),
+    ('price_wide_all', 'price_range', (MIN, 1, 0), (MAX, 1, 0), ''),
+    ('price_wide_lower_half', 'price_range', (MIN, 1, 0), (AVG, 1, 0), ''),
+    ('price_wide_upper_half', 'price_range', (AVG, 1, 0), (MAX, 1, 0), ''),
+    
+    # Long name text searches
+    ('long_name_investment', 'text_search', (NO_PRICE, 1, 0), (NO_PRICE, 1, 0), 'Investment'),
+    ('long_name_fund', 'text_search', (NO_PRICE, 1, 0), (NO_PRICE, 1, 0), 'Fund'),
+    ('long_name_technology', 'text_search', (NO_PRICE, 1, 0), (NO_PRICE, 1, 0), 'Technology'),
+    ('long_name_global', 'text_search', (NO_PRICE, 1, 0), (NO_PRICE, 1, 0), 'Global'),
+    ('long_name_strategy', 'text_search', (NO_PRICE, 1, 0), (NO_PRICE, 1, 0), 'Strategy'),
+    ('long_name_financial', 'text_search', (NO_PRICE, 1, 0), (NO_PRICE, 1, 0), 'Financial'),
+    ('long_name_management', 'text_search', (NO_PRICE, 1, 0), (NO_PRICE, 1, 0), 'Management'),
+    ('long_name_portfolio', 'text_search', (NO_PRICE, 1, 0), (NO_PRICE, 1, 0), 'Portfolio'),
+    ('long_name_diversified', 'text_search', (NO_PRICE, 1, 0), (NO_PRICE, 1, 0), 'Diversified'),
+    ('long_name_sustainable', 'text_search', (NO_PRICE, 1, 0), (NO_PRICE, 1, 0), 'Sustainable'),
+    
+    # Combined searches (price + text)
+    ('combined_tech_mid_price', 'combined', (AVG, 0.5, 0), (AVG, 1.5, 0), 'Technology'),
+    ('combined_global_high_price', 'combined', (AVG, 1.5, 0), (MAX, 1, 0), 'Global'),
+    ('combined_fund_low_price', 'combined', (MIN, 1, 0), (AVG, 0.5, 0), 'Fund'),
+)
+
+def _text_width(column):
+    """Longest string in a SEARCH_TEMPLATES column, so no template is truncated"""
+    return max(len(template[column]) for template in SEARCH_TEMPLATES)
+
+# Row layout of the search table; text is empty for pure price range searches and
+# the price bounds are NaN for pure text searches
+SEARCH_TABLE_DTYPE = np.dtype([
+    ('search_type', f'U{_text_width(0)}'), ('query_type', f'U{_text_width(1)}'),
+    ('min_price', 'f8'), ('max_price', 'f8'), ('text_query', f'U{_text_width(4)}')
+])
+
+# Template columns, split once at import so building a table is pure array math
+_TEMPLATE_ROWS = np.array([(t[0], t[1], np.nan, np.nan, t[4]) for t in SEARCH_TEMPLATES], dtype=SEARCH_TABLE_DTYPE)
+_TEMPLATE_BOUNDS = np.array([(t[2], t[3]) for t in SEARCH_TEMPLATES], dtype=np.float64)
+
+def build_search_table(price_stats):
+    """Resolve the search templates against the current price statistics"""
+    stats = np.array([price_stats['min'], price_stats['avg'], price_stats['max'], np.nan])
+    bounds = stats[_TEMPLATE_BOUNDS[..., 0].astype(np.intp)] * _TEMPLATE_BOUNDS[..., 1] + _TEMPLATE_BOUNDS[..., 2]
+    
+    search_table = _TEMPLATE_ROWS.copy()
+    search_table['min_price'] = bounds[:, 0]
+    search_table['max_price'] = bounds[:, 1]
+    return search_table
+
+def generate_search_queries(search_table, price_stats, count):
+    """Draw a batch of random search queries from the search table"""
     min_price = price_stats['min']
     max_price = price_stats['max']
-    avg_price = price_stats['avg']
-    
-    # Different types of search queries to test various scenarios
-    search_types = [
-        # Price range searches
-        ('price_narrow_low', 'price_range', min_price, min_price + 50),
-        ('price_narrow_mid', 'price_range', avg_price - 25, avg_price + 25),
-        ('price_narrow_high', 'price_range', max_price - 100, max_price),
-        ('price_medium_low', 'price_range', min_price, avg_price * 0.5),
-        ('price_medium_mid', 'price_range', avg_price * 0.5, avg_price * 1.5),
-        ('price_medium_high', 'price_range', avg_price * 1.5, max_price),
-        ('price_wide_all', 'price_range', min_price, max_price),
-        ('price_wide_lower_half', 'price_range', min_price, avg_price),
-        ('price_wide_upper_half', 'price_range', avg_price, max_price),
-        
-        # Long name text searches
-        ('long_name_investment', 'text_search', 'Investment'),
-        ('long_name_fund', 'text_search', 'Fund'),
-        ('long_name_technology', 'text_search', 'Technology'),
-        ('long_name_global', 'text_search', 'Global'),
-        ('long_name_strategy', 'text_search', 'Strategy'),
-        ('long_name_financial', 'text_search', 'Financial'),
-        ('long_name_management', 'text_search', 'Management'),
-        ('long_name_portfolio', 'text_search', 'Portfolio'),
-        ('long_name_diversified', 'text_search', 'Diversified'),
-        ('long_name_sustainable', 'text_search', 'Sustainable'),
-        
-        # Combined searches (price + text)
-        ('combined_tech_mid_price', 'combined', 'Technology', avg_price * 0.5, avg_price * 1.5),
-        ('combined_global_high_price', 'combined', 'Global', avg_price * 1.5, max_price),
-        ('combined_fund_low_price', 'combined', 'Fund', min_price, avg_price * 0.5),
-    ]
     
-    # Pick a random search type
-    search_info = random.choice(search_types)
-    search_type = search_info[0]
-    query_type = search_info[1]
+    # Pick random search types and jitter their price bounds by up to $10
+    picked = search_table[rng.integers(0, len(search_table), count)]
+    jitter = rng.uniform(-10, 10, (2, count))
+    range_max = np.minimum(max_price, picked['max_price'] + jitter[1])
+    range_min = np.maximum(min_price, picked['min_price'] + jitter[0])
+    range_min = np.where(range_min >= range_max, range_max - 1, range_min)
     
-    if query_type == 'price_range':
-        range_min = max(min_price, search_info[2] + random.uniform(-10, 10))
-        range_max = min(max_price, search_info[3] + random.uniform(-10, 10))
-        if range_min >= range_max:
-            range_min = range_max - 1
-        return search_type, query_type, round(range_min, 2), round(range_max, 2), None
-    elif query_type == 'text_search':
-        return search_type, query_type, None, None, search_info[2]
-    elif query_type == 'combined':
-        range_min = max(min_price, search_info[3] + random.uniform(-10, 10))
-        range_max = min(max_price, search_info[4] + random.uniform(-10, 10))
-        if range_min >= range_max:
-            range_min = range_max - 1
-        return search_type, query_type, round(range_min, 2), round(range_max, 2), search_info[2]
+    queries = []
+    for search_type, query_type, low, high, text_query in zip(
+            picked['search_type'].tolist(), picked['query_type'].tolist(),
+            np.round(range_min, 2).tolist(), np.round(range_max, 2).tolist(),
+            picked['text_query'].tolist()):
+        if query_type == 'text_search':
+            low = high = None
+        queries.append((search_type, query_type, low, high, text_query or None))
     
-    return search_type, query_type, None, None, None
+    return queries
+
+# Encoded request bodies keyed by query type; each query only fills in its own slots
+SEARCH_BODY_TEMPLATES = {
+    'price_range': b'{"query":{"range":{"price":{"gte":%(min_price).2f,"lte":%(max_price).2f}}},%(options)s}',
+    'text_search': b'{"query":{"match":{"long_name":{"query":%(text_query)s,"operator":"and"}}},%(options)s}',
+    'combined': (
+        b'{"query":{"bool":{"must":['
+        b'{"match":{"long_name":{"query":%(text_query)s,"operator":"and"}}},'
+        b'{"range":{"price":{"gte":%(min_price).2f,"lte":%(max_price).2f}}}]}},%(options)s}'
+    ),
+}
 
-def perform_search(client, query_type, min_price=None, max_price=None, text_query=None, index_name="instruments"):
-    """Perform different types of searches and measure performance"""
-    start_time = time.time()
+def encode_search_options(sample_size=3, sort=False, count_only=False, fetch_source=True):
+    """Encode the request options shared by every search body"""
+    if count_only:
+        # No fetch phase, so only query execution is timed
+        return b'"size":0,"track_total_hits":true'
     
-    try:
-        # Build query based on type
-        if query_type == 'price_range':
-            search_body = {
-                "query": {
-                    "range": {
-                        "price": {
-                            "gte": min_price,
-                            "lte": max_price
-                        }
-                    }
-                },
-                "size": 100,
-                "sort": [{"price": {"order": "asc"}}]
-            }
-        elif query_type == 'text_search':
-            search_body = {
-                "query": {
-                    "match": {
-                        "long_name": {
-                            "query": text_query,
-                            "operator": "and"
-                        }
-                    }
-                },
-                "size": 100,
-                "sort": [{"price": {"order": "asc"}}]
-            }
-        elif query_type == 'combined':
-            search_body = {
-                "query": {
-                    "bool": {
-                        "must": [
-                            {
-                                "match": {
-                                    "long_name": {
-                                        "query": text_query,
-                                        "operator": "and"
-                                    }
-                                }
-                            },
-                            {
-                                "range": {
-                                    "price": {
-                                        "gte": min_price,
-                                        "lte": max_price
-                                    }
-                                }
-                            }
-                        ]
-                    }
-                },
-                "size": 100,
-                "sort": [{"price": {"order": "asc"}}]
-            }
+    # Only the sampled fields are fetched, or none when no samples are kept;
+    # the exact total is still counted
+    options = {
+        "size": sample_size,
+        "_source": {"includes": ["isin", "price", "long_name"]} if fetch_source else False,
+        "track_total_hits": True
+    }
+    if sort:
+        options["sort"] = [{"price": {"order": "asc"}}]
+    return json.dumps(options, separators=(',', ':')).encode()[1:-1]
+
+def build_search_body(query_type, min_price, max_price, text_query, body_options):
+    """Build the encoded search request body for a query type"""
+    template = SEARCH_BODY_TEMPLATES.get(query_type)
+    if template is None:
+        raise ValueError(f"Unknown query type: {query_type}")
+    
+    return template % {
+        b'min_price': min_price,
+        b'max_price': max_price,
+        b'text_query': json.dumps(text_query).encode(),
+        b'options': body_options
+    }
+
+def summarize_response(response, sample_hits):
+    """Extract hit counts and sample data from a single search response"""
+    # filter_path drops the hits array entirely when nothing matched
+    hits = response['hits'].get('hits', [])
+    
+    # Get some sample data for verification
+    sample_data = []
+    for hit in hits[:sample_hits]:
+        source = hit['_source']
+        long_name = source.get('long_name') or 'N/A'
+        sample_data.append({
+            'isin': source['isin'],
+            'price': source['price'],
+            'long_name': long_name[:50] + '...' if len(long_name) > 50 else long_name
+        })
+    
+    return {
+        'success': True,
+        'took_ms': response['took'],
+        'total_hits': response['hits']['total']['value'],
+        'returned_hits': len(hits),
+        'sample_data': sample_data,
+        'error': None
+    }
+
+def failed_result(error, took_ms=None):
+    """Result entry for a search that did not complete"""
+    return {
+        'success': False,
+        'took_ms': took_ms,
+        'total_hits': 0,
+        'returned_hits': 0,
+        'sample_data': [],
+        'error': error
+    }
+
+# Only the response fields read by msearch_results; shard stats, scores and
+# other document metadata are left out of the response. _id keeps the hits
+# countable when no _source is fetched
+MSEARCH_FILTER_PATH = [
+    'responses.took', 'responses.status', 'responses.error',
+    'responses.hits.total.value', 'responses.hits.hits._id', 'responses.hits.hits._source'
+]
+
+def encode_msearch_header(request_cache=False):
+    """Encode the header line sent before every msearch query"""
+    # msearch has no request-level preference; it is set in each query header
+    header = {"preference": SEARCH_PREFERENCE}
+    if request_cache:
+        header["request_cache"] = True
+    return json.dumps(header).encode() + b'\n'
+
+def build_search_options(sample_size=3, sort=False, count_only=False, quiet=False):
+    """Encode the request options for a run once, to be passed to every batch"""
+    return {
+        # Samples are only collected to be printed, so quiet runs fetch no _source at all
+        'body_options': encode_search_options(sample_size, sort, count_only, fetch_source=not quiet),
+        # Hit-less responses can be served from the shard request cache
+        'msearch_header': encode_msearch_header(request_cache=count_only),
+        'sample_hits': 0 if quiet else sample_size
+    }
+
+def build_msearch_body(queries, search_options):
+    """Join one header/body pair per query into a single NDJSON request"""
+    header = search_options['msearch_header']
+    body_options = search_options['body_options']
+    return b''.join(
+        header + build_search_body(query_type, min_price, max_price, text_query, body_options) + b'\n'
+        for query_type, min_price, max_price, text_query in queries
+    )
+
+def msearch_results(response, sample_hits):
+    """Split an msearch response into one result per query"""
+    results = []
+    for item in response['responses']:
+        if 'error' in item:
+            results.append(failed_result(str(item['error']), item.get('took')))
         else:
-            raise ValueError(f"Unknown query type: {query_type}")
-        
-        # Perform the search
-        response = client.search(index=index_name, body=search_body)
-        
-        end_time = time.time()
-        duration = end_time - start_time
-        
-        # Extract results
-        total_hits = response['hits']['total']['value']
-        returned_hits = len(response['hits']['hits'])
-        
-        # Get some sample data for verification
-        sample_data = []
-        for hit in response['hits']['hits'][:3]:
-            source = hit['_source']
-            sample_data.append({
-                'isin': source['isin'],
-                'price': source['price'],
-                'long_name': source.get('long_name', 'N/A')[:50] + '...' if len(source.get('long_name', '')) > 50 else source.get('long_name', 'N/A')
-            })
-        
-        return {
-            'success': True,
-            'duration': duration,
-            'total_hits': total_hits,
-            'returned_hits': returned_hits,
-            'sample_data': sample_data,
-            'error': None
-        }
-        
+            results.append(summarize_response(item, sample_hits))
+    
+    return results
+
+def msearch_request(queries, search_options, index_name):
+    """Keyword arguments of the msearch call for a batch of queries"""
+    return {'index': index_name, 'body': build_msearch_body(queries, search_options), 'filter_path': MSEARCH_FILTER_PATH}
+
+def batch_results(queries, request_ns, search_options, response=None, error=None):
+    """Turn one msearch round trip into a result per query, annotated with its timing"""
+    if error is None:
+        try:
+            results = msearch_results(response, search_options['sample_hits'])
+        except Exception as e:
+            error = e
+    if error is not None:
+        results = [failed_result(str(error)) for _ in queries]
+    
+    # Client-side latency is the round trip of the whole msearch, shared by every
+    # query in the batch; the server's whole-millisecond 'took' is kept next to it
+    for result in results:
+        result['duration'] = request_ns / 1e9
+        result['duration_ns'] = request_ns
+    
+    return results
+
+def perform_searches(client, queries, search_options, index_name="instruments"):
+    """Run a batch of searches in one msearch request and measure each one"""
+    start_ns = time.perf_counter_ns()
+    
+    try:
+        response = client.msearch(**msearch_request(queries, search_options, index_name))
     except Exception as e:
-        end_time = time.time()
-        duration = end_time - start_time
-        
-        return {
-            'success': False,
-            'duration': duration,
-            'total_hits': 0,
-            'returned_hits': 0,
-            'sample_data': [],
-            'error': str(e)
-        }
+        return batch_results(queries, time.perf_counter_ns() - start_ns, search_options, error=e)
+    return batch_results(queries, time.perf_counter_ns() - start_ns, search_options, response)
 
-def log_search_metrics(search_id, search_type, query_type, min_price, max_price, text_query, result, csv_file="search_performance_metrics.csv"):
-    """Log search performance metrics to CSV"""
+async def async_perform_searches(client, queries, search_options, index_name="instruments"):
+    """Run a batch of searches in one msearch request on the asyncio client"""
+    start_ns = time.perf_counter_ns()
     
-    # Check if file exists to write header
-    file_exists = False
     try:
-        with open(csv_file, 'r'):
-            file_exists = True
-    except FileNotFoundError:
-        pass
-    
-    # Write metrics
-    with open(csv_file, 'a', newline='') as f:
-        writer = csv.writer(f)
-        
-        if not file_exists:
-            # Write header
-            writer.writerow([
-                'timestamp', 'search_id', 'search_type', 'query_type', 'min_price', 'max_price', 
-                'price_range_width', 'text_query', 'success', 'duration_ms', 'total_hits', 
-                'returned_hits', 'hits_per_ms', 'sample_data', 'error'
-            ])
-        
-        # Calculate metrics
-        price_range_width = (max_price - min_price) if min_price and max_price else 0
-        duration_ms = result['duration'] * 1000  # Convert to milliseconds
-        hits_per_ms = result['total_hits'] / duration_ms if duration_ms > 0 else 0
-        
-        # Write data
-        writer.writerow([
-            datetime.now().isoformat(),
-            search_id,
-            search_type,
-            query_type,
-            min_price if min_price else '',
-            max_price if max_price else '',
-            round(price_range_width, 2) if price_range_width > 0 else '',
-            text_query if text_query else '',
-            result['success'],
-            round(duration_ms, 2),
-            result['total_hits'],
-            result['returned_hits'],
-            round(hits_per_ms, 2),
-            str(result['sample_data']),
-            result['error']
-        ])
+        response = await client.msearch(**msearch_request(queries, search_options, index_name))
+    except Exception as e:
+        return batch_results(queries, time.perf_counter_ns() - start_ns, search_options, error=e)
+    return batch_results(queries, time.perf_counter_ns() - start_ns, search_options, response)
 
-def main():
-    """Main function to run continuous search performance testing"""
-    global running
+async def async_perform_batches(client, batches, search_options):
+    """Send every batch as its own concurrent msearch request"""
+    results = await asyncio.gather(*(
+        async_perform_searches(client, [query[1:] for query in batch], search_options) for batch in batches
+    ))
+    return [result for batch_results in results for result in batch_results]
+
+def open_metrics_log(log_file):
+    """Open the metrics log for buffered binary appends"""
+    # One JSON object per line; rows are buffered in 64KB blocks and flushed by the writer thread
+    return open(log_file, 'ab', buffering=64 * 1024)
+
+def dump_json_line(row):
+    """Encode a metrics row as a JSON line"""
+    if ORJSON_AVAILABLE:
+        return orjson.dumps(row, option=orjson.OPT_APPEND_NEWLINE)
+    return json.dumps(row).encode() + b'\n'
+
+def write_metrics_rows(metrics_log, log_queue):
+    """Writer thread: drain queued metrics rows into the log until the None sentinel"""
+    written = 0
+    while True:
+        row = log_queue.get()
+        if row is None:
+            break
+        row['timestamp'] = datetime.fromtimestamp(row['timestamp']).isoformat(timespec='microseconds')
+        metrics_log.write(dump_json_line(row))
+        written += 1
+        if written % METRICS_FLUSH_ROWS == 0:
+            metrics_log.flush()
+
+def start_metrics_writer(metrics_log):
+    """Start the background thread that owns all writes to the metrics log"""
+    log_queue = queue.Queue(maxsize=1000)
+    writer = threading.Thread(target=write_metrics_rows, args=(metrics_log, log_queue), daemon=True)
+    writer.start()
+    return log_queue, writer
+
+def log_search_metrics(log_queue, search_id, search_type, query_type, min_price, max_price, text_query, result):
+    """Queue search performance metrics for the JSON lines log"""
     
-    # Set up signal handlers for graceful shutdown
-    signal.signal(signal.SIGINT, signal_handler)
-    signal.signal(signal.SIGTERM, signal_handler)
+    # Calculate metrics
+    price_range_width = (max_price - min_price) if min_price is not None and max_price is not None else None
+    duration_ms = result['duration'] * 1000  # Convert to milliseconds
+    hits_per_ms = result['total_hits'] / duration_ms if duration_ms > 0 else 0
+    
+    # Hand the row to the writer thread; blocks only if it falls 1000 rows behind
+    log_queue.put({
+        'timestamp': time.time(),  # Formatted by the writer thread
+        'search_id': search_id,
+        'search_type': search_type,
+        'query_type': query_type,
+        'min_price': min_price,
+        'max_price': max_price,
+        'price_range_width': round(price_range_width, 2) if price_range_width is not None else None,
+        'text_query': text_query,
+        'success': result['success'],
+        'duration_ms': round(duration_ms, 2),
+        'request_us': result['duration_ns'] // 1000,
+        'took_ms': result['took_ms'],
+        'total_hits': result['total_hits'],
+        'returned_hits': result['returned_hits'],
+        'hits_per_ms': round(hits_per_ms, 2),
+        'sample_data': result['sample_data'],
+        'error': result['error']
+    })
+
+def print_search_result(search_id, search_type, query_type, min_price, max_price, text_query, result):
+    """Print a search and its outcome"""
+    # Create search description
+    if query_type == 'price_range':
+        search_desc = f"{search_type}: ${min_price:.2f} - ${max_price:.2f}"
+    elif query_type == 'text_search':
+        search_desc = f"{search_type}: '{text_query}'"
+    elif query_type == 'combined':
+        search_desc = f"{search_type}: '{text_query}' + ${min_price:.2f} - ${max_price:.2f}"
+    else:
+        search_desc = f"{search_type}: unknown"
+    
+    print(f"[{datetime.now().strftime('%H:%M:%S')}] Search #{search_id} - {search_desc}")
+    
+    # Print summary
+    if result['success']:
+        print(f"  ✓ Found {result['total_hits']} instruments in {result['duration']*1000:.2f}ms")
+        if result['sample_data']:
+            print(f"    Sample results:")
+            for i, sample in enumerate(result['sample_data'][:2], 1):
+                print(f"      {i}. {sample['isin']} - ${sample['price']:.2f}")
+                if query_type != 'price_range':
+                    print(f"         {sample['long_name']}")
+    else:
+        print(f"  ✗ Search failed: {result['error']}")
     
-    print("Search Performance Tester - Continuous Price Range Searches")
-    print("=" * 65)
-    print("Press Ctrl+C to stop gracefully")
     print()
+
+def parse_args():
+    """Parse command line options"""
+    parser = argparse.ArgumentParser(description="Continuously run searches and log their latency")
+    parser.add_argument("--batch-size", type=int, default=10,
+                        help="number of searches sent together in each msearch request (default: 10)")
+    parser.add_argument("--sample-size", type=int, default=3,
+                        help="hits returned per search; only the sample fields are fetched (default: 3)")
+    parser.add_argument("--sort", action="store_true",
+                        help="sort hits by price, to include sorting in the measured latency")
+    parser.add_argument("--count-only", action="store_true",
+                        help="return no hits, only total counts, to time query execution without the fetch phase")
+    parser.add_argument("--qps", type=float, default=10,
+                        help="searches per second across all workers, 0 to run flat-out (default: 10)")
+    parser.add_argument("--quiet", action="store_true",
+                        help="only print failed searches; hits are returned without _source and no samples are logged")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="worker processes, each with its own client and event loop; --qps is split between them (default: 1)")
+    parser.add_argument("--concurrency", type=int, default=1,
+                        help=f"msearch requests in flight at once through the asyncio client (default: 1, max: {MAX_CONCURRENCY})")
+    args = parser.parse_args()
     
-    # Create OpenSearch client
-    try:
-        client = create_opensearch_client()
-        client.info()  # Test connection
-        print("✓ Connected to OpenSearch")
-    except Exception as e:
-        print(f"✗ Failed to connect to OpenSearch: {e}")
-        return
+    for option in ('batch_size', 'workers', 'concurrency'):
+        if getattr(args, option) < 1:
+            parser.error(f"--{option.replace('_', '-')} must be at least 1")
+    for option in ('sample_size', 'qps'):
+        if getattr(args, option) < 0:
+            parser.error(f"--{option.replace('_', '-')} must be 0 or more")
+    return args
+
+def worker_metrics_file(metrics_file, worker_id):
+    """Metrics file written by one worker process"""
+    return metrics_file.replace('.jsonl', f'.{worker_id}.jsonl')
+
+def run_searches(args, metrics_file, worker_id=0):
+    """Run searches until stopped, logging each one to the metrics file"""
+    global running
+    
+    search_options = build_search_options(args.sample_size, args.sort, args.count_only, args.quiet)
+    client = create_opensearch_client()
     
     # Get price statistics
     print("Getting price statistics...")
     price_stats = get_price_statistics(client)
     print(f"✓ Price range: ${price_stats['min']:.2f} - ${price_stats['max']:.2f} (avg: ${price_stats['avg']:.2f})")
+    search_state = {'current': (price_stats, build_search_table(price_stats))}
+    stats_fetched_at = time.monotonic()
+    stats_thread = None
     print()
     
-    # Initialize CSV file
-    csv_file = "search_performance_metrics.csv"
-    print(f"✓ Logging metrics to: {csv_file}")
+    # Concurrent requests share one event loop and async client for the whole run
+    async_loop = None
+    if args.concurrency > 1:
+        if not ASYNC_AVAILABLE:
+            print("✗ --concurrency needs the async client: pip install 'opensearch-py[async]'")
+            return 0
+        concurrency = min(args.concurrency, MAX_CONCURRENCY)
+        async_loop = asyncio.new_event_loop()
+        async_client = create_async_opensearch_client(concurrency)
+        print(f"✓ Running {concurrency} concurrent msearch requests per round")
+        print()
+    
+    # Initialize metrics log
+    metrics_log = open_metrics_log(metrics_file)
+    log_queue, log_writer = start_metrics_writer(metrics_log)
+    print(f"✓ Logging metrics to: {metrics_file}")
     print()
     
-    # Continuous search loop
-    search_id = 1
+    # Continuous search loop; workers number their searches in interleaved sequences
+    search_id = worker_id + 1
+    search_count = 0
+    # --qps counts searches across all workers; every round sends one full batch per concurrent request
+    searches_per_round = args.batch_size * (concurrency if async_loop else 1)
+    qps = args.qps / args.workers
+    round_interval = searches_per_round / qps if qps > 0 else 0.0
+    next_send_at = time.perf_counter()
     
     while running:
         try:
-            # Generate random search query
-            search_type, query_type, min_price, max_price, text_query = generate_search_query(price_stats)
-            
-            # Create search description
-            if query_type == 'price_range':
-                search_desc = f"{search_type}: ${min_price:.2f} - ${max_price:.2f}"
-            elif query_type == 'text_search':
-                search_desc = f"{search_type}: '{text_query}'"
-            elif query_type == 'combined':
-                search_desc = f"{search_type}: '{text_query}' + ${min_price:.2f} - ${max_price:.2f}"
-            else:
-                search_desc = f"{search_type}: unknown"
-            
-            print(f"[{datetime.now().strftime('%H:%M:%S')}] Search #{search_id} - {search_desc}")
-            
-            # Perform search
-            result = perform_search(client, query_type, min_price, max_price, text_query)
+            # Refresh stale statistics without blocking the searches; at most one refresh at a time
+            if time.monotonic() - stats_fetched_at > STATS_REFRESH_SECONDS and not (stats_thread and stats_thread.is_alive()):
+                stats_fetched_at = time.monotonic()
+                stats_thread = threading.Thread(target=refresh_price_statistics, args=(client, search_state), daemon=True)
+                stats_thread.start()
+            price_stats, search_table = search_state['current']
             
-            # Log metrics
-            log_search_metrics(search_id, search_type, query_type, min_price, max_price, text_query, result, csv_file)
-            
-            # Print summary
-            if result['success']:
-                print(f"  ✓ Found {result['total_hits']} instruments in {result['duration']*1000:.2f}ms")
-                if result['sample_data']:
-                    print(f"    Sample results:")
-                    for i, sample in enumerate(result['sample_data'][:2], 1):
-                        print(f"      {i}. {sample['isin']} - ${sample['price']:.2f}")
-                        if query_type != 'price_range':
-                            print(f"         {sample['long_name']}")
+            if async_loop:
+                # One random batch per concurrent msearch request
+                batches = [generate_search_queries(search_table, price_stats, args.batch_size)
+                           for _ in range(concurrency)]
+                results = async_loop.run_until_complete(async_perform_batches(async_client, batches, search_options))
+                batch = [query for queries in batches for query in queries]
             else:
-                print(f"  ✗ Search failed: {result['error']}")
+                # Generate a batch of random search queries
+                batch = generate_search_queries(search_table, price_stats, args.batch_size)
+                
+                # Perform all searches of the batch in one request
+                results = perform_searches(client, [query[1:] for query in batch], search_options)
             
-            print()
-            search_id += 1
+            for (search_type, query_type, min_price, max_price, text_query), result in zip(batch, results):
+                # Log metrics
+                log_search_metrics(log_queue, search_id, search_type, query_type, min_price, max_price, text_query, result)
+                
+                if not args.quiet:
+                    print_search_result(search_id, search_type, query_type, min_price, max_price, text_query, result)
+                elif not result['success']:
+                    print(f"✗ Search #{search_id} failed: {result['error']}")
+                
+                search_id += args.workers
+                search_count += 1
             
-            # Short pause between searches
-            if running:
-                time.sleep(1)  # 1 second between searches
+            # Wait for the next round slot; a late round starts at once without bursting to catch up
+            if running and round_interval:
+                next_send_at = max(next_send_at + round_interval, time.perf_counter())
+                time.sleep(max(0.0, next_send_at - time.perf_counter()))
                 
         except KeyboardInterrupt:
             print("\nReceived interrupt signal. Shutting down...")
@@ -357,8 +618,91 @@ def main():
             print("Waiting 2 seconds before retry...")
             time.sleep(2)
     
-    print(f"\n🏁 Search performance tester stopped after {search_id-1} searches")
-    print(f"📊 Metrics saved to: {csv_file}")
+    if async_loop:
+        async_loop.run_until_complete(async_client.close())
+        async_loop.close()
+    
+    # Let the writer thread drain the queue before closing the log
+    log_queue.put(None)
+    log_writer.join()
+    metrics_log.close()
+    return search_count
+
+def search_worker(args, metrics_file, worker_id, search_counts):
+    """Worker process: run the search loop with its own client and metrics file"""
+    # Ctrl+C reaches every worker directly; other signals only reach the parent,
+    # which forwards them as SIGINT
+    signal.signal(signal.SIGINT, signal_handler)
+    signal.signal(signal.SIGTERM, signal.SIG_IGN)
+    search_counts[worker_id] = run_searches(args, worker_metrics_file(metrics_file, worker_id), worker_id)
+
+def run_search_workers(args, metrics_file):
+    """Run the search loop in worker processes and merge their metrics files"""
+    # Spawned workers start with a fresh interpreter: no inherited client
+    # connections and a freshly seeded random generator each
+    context = multiprocessing.get_context('spawn')
+    search_counts = context.Array('q', args.workers)
+    workers = [
+        context.Process(target=search_worker, args=(args, metrics_file, worker_id, search_counts))
+        for worker_id in range(args.workers)
+    ]
+    for worker in workers:
+        worker.start()
+    print(f"✓ Started {args.workers} worker processes")
+    
+    # A multiprocessing.Event is not used to stop the workers: setting it waits for
+    # every waiter to wake up, and hangs if a worker already exited on its own Ctrl+C
+    stopping = False
+    while any(worker.is_alive() for worker in workers):
+        if not running and not stopping:
+            stopping = True
+            for worker in workers:
+                if worker.is_alive():
+                    os.kill(worker.pid, signal.SIGINT)
+        for worker in workers:
+            worker.join(timeout=0.5)
+    
+    # Append each worker's rows to the main metrics file; analyze_performance
+    # puts the rows of all workers back in time order
+    with open(metrics_file, 'ab') as merged:
+        for worker_id in range(args.workers):
+            worker_file = worker_metrics_file(metrics_file, worker_id)
+            if os.path.exists(worker_file):
+                with open(worker_file, 'rb') as rows:
+                    shutil.copyfileobj(rows, merged)
+                os.remove(worker_file)
+    return sum(search_counts)
+
+def main():
+    """Main function to run continuous search performance testing"""
+    args = parse_args()
+    
+    # Set up signal handlers for graceful shutdown
+    signal.signal(signal.SIGINT, signal_handler)
+    signal.signal(signal.SIGTERM, signal_handler)
+    
+    print("Search Performance Tester - Continuous Price Range Searches")
+    print("=" * 65)
+    print("Press Ctrl+C to stop gracefully")
+    print()
+    
+    # Create OpenSearch client
+    try:
+        client = create_opensearch_client()
+        client.info()  # Test connection
+        print("✓ Connected to OpenSearch")
+    except Exception as e:
+        print(f"✗ Failed to connect to OpenSearch: {e}")
+        return
+    
+    metrics_file = "search_performance_metrics.jsonl"
+    if args.workers > 1:
+        search_count = run_search_workers(args, metrics_file)
+    else:
+        search_count = run_searches(args, metrics_file)
+    
+    print(f"\n🏁 Search performance tester stopped after {search_count} searches")
+    print(f"📊 Metrics saved to: {metrics_file}")
 
 if __name__ == "__main__":
-    main() 
\ No newline at end of file
+    main()